@@ -5,7 +5,6 @@ CLI Runner for the Emakia Validator Agent.
 This module provides a command-line interface for the validation agent.
 """
 
-import asyncio
 import argparse
 import json
 import sys
@@ -14,7 +13,7 @@ from pathlib import Path
 # Add src to path for imports
 sys.path.append(str(Path(__file__).parent.parent / "src"))
 
-from src.main import EmakiaValidatorAgent
+from src.main import EmakiaValidatorAgent, run_event_loop
 
 
 async def main():
@@ -277,4 +276,4 @@ def print_batch_summary(results):
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_event_loop(main())
@@ -9,7 +9,7 @@ using multiple AI model providers and validation pipelines.
 import asyncio
 import logging
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Coroutine, Optional
 
 from dotenv import load_dotenv
 from loguru import logger
@@ -21,6 +21,12 @@ from src.utils.logging import setup_logging
 from src.utils.metrics import MetricsCollector
 from src.config.model_config import load_config
 
+try:
+    import uvloop
+except ImportError:
+    # uvloop is not available on Windows
+    uvloop = None
+
 
 class EmakiaValidatorAgent:
     """
@@ -158,6 +164,28 @@ class EmakiaValidatorAgent:
         return health_status
 
 
+def run_event_loop(main_coro: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Run a coroutine to completion, on uvloop when it is installed.
+    
+    Args:
+        main_coro: Coroutine to run
+        
+    Returns:
+        The coroutine's result
+    """
+    if uvloop is None:
+        return asyncio.run(main_coro)
+    
+    logger.debug("Using uvloop event loop")
+    if hasattr(uvloop, 'run'):
+        return uvloop.run(main_coro)
+    
+    # uvloop releases before 0.18 have no run(); install() is deprecated on Python 3.12+
+    uvloop.install()
+    return asyncio.run(main_coro)
+
+
 async def main():
     """
     Main function for CLI usage.
@@ -216,4 +244,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_event_loop(main())
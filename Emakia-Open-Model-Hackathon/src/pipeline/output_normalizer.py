@@ -5,11 +5,58 @@ This module provides functionality to normalize and standardize outputs from
 the validation and classification pipelines.
 """
 
-import json
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+import orjson
 from loguru import logger
 
+# Raw result keys copied into normalized records, paired with their
+# normalized names
+_VALIDATION_FIELDS = (
+    ('is_valid', 'is_valid'),
+    ('confidence', 'confidence'),
+    ('violations', 'violations'),
+    ('suggestions', 'suggestions'),
+    ('validation_type', 'validation_type'),
+    ('model_provider', 'model_provider'),
+    ('validation_details', 'details')
+)
+_CLASSIFICATION_FIELDS = (
+    ('category', 'category'),
+    ('confidence', 'confidence'),
+    ('reasoning', 'reasoning'),
+    ('all_categories', 'all_categories'),
+    ('model_provider', 'model_provider'),
+    ('classification_type', 'classification_type'),
+    ('threshold_met', 'threshold_met'),
+    ('threshold', 'threshold')
+)
+
+# Categories that mark otherwise valid content as flagged
+FLAGGED_CATEGORIES = frozenset({'unsafe', 'inappropriate', 'hate_speech', 'violence', 'adult_content'})
+
+# Overall status indexed by (has errors << 2) | (invalid << 1) | flagged;
+# errors take precedence over failed validation, which beats flagging
+_STATUS_TABLE = tuple(
+    'error' if key & 4 else 'validation_failed' if key & 2 else 'content_flagged' if key & 1 else 'success'
+    for key in range(8)
+)
+
+
+def _as_list(value: Any) -> List[Any]:
+    """
+    Coerce a field that should be a list, wrapping a single value.
+    
+    Args:
+        value: Field value
+        
+    Returns:
+        The value if it is a list, otherwise a list holding it (empty if falsy)
+    """
+    if isinstance(value, list):
+        return value
+    return [value] if value else []
+
 
 class OutputNormalizer:
     """
@@ -99,29 +146,14 @@ class OutputNormalizer:
             'details': {}
         }
         
-        # Copy basic fields
-        for key in ['is_valid', 'confidence', 'violations', 'suggestions']:
+        # Copy the fields that are present in one pass
+        for key, target in _VALIDATION_FIELDS:
             if key in validation_result:
-                normalized[key] = validation_result[key]
-        
-        # Handle validation type
-        if 'validation_type' in validation_result:
-            normalized['validation_type'] = validation_result['validation_type']
-        
-        # Handle model provider
-        if 'model_provider' in validation_result:
-            normalized['model_provider'] = validation_result['model_provider']
-        
-        # Handle detailed validation results
-        if 'validation_details' in validation_result:
-            normalized['details'] = validation_result['validation_details']
+                normalized[target] = validation_result[key]
         
         # Ensure violations and suggestions are lists
-        if not isinstance(normalized['violations'], list):
-            normalized['violations'] = [normalized['violations']] if normalized['violations'] else []
-        
-        if not isinstance(normalized['suggestions'], list):
-            normalized['suggestions'] = [normalized['suggestions']] if normalized['suggestions'] else []
+        normalized['violations'] = _as_list(normalized['violations'])
+        normalized['suggestions'] = _as_list(normalized['suggestions'])
         
         return normalized
     
@@ -146,29 +178,13 @@ class OutputNormalizer:
             'threshold': 0.0
         }
         
-        # Copy basic fields
-        for key in ['category', 'confidence', 'reasoning', 'all_categories']:
+        # Copy the fields that are present in one pass
+        for key, target in _CLASSIFICATION_FIELDS:
             if key in classification_result:
-                normalized[key] = classification_result[key]
-        
-        # Handle model provider
-        if 'model_provider' in classification_result:
-            normalized['model_provider'] = classification_result['model_provider']
-        
-        # Handle classification type
-        if 'classification_type' in classification_result:
-            normalized['classification_type'] = classification_result['classification_type']
-        
-        # Handle threshold information
-        if 'threshold_met' in classification_result:
-            normalized['threshold_met'] = classification_result['threshold_met']
-        
-        if 'threshold' in classification_result:
-            normalized['threshold'] = classification_result['threshold']
+                normalized[target] = classification_result[key]
         
         # Ensure all_categories is a list
-        if not isinstance(normalized['all_categories'], list):
-            normalized['all_categories'] = [normalized['all_categories']] if normalized['all_categories'] else []
+        normalized['all_categories'] = _as_list(normalized['all_categories'])
         
         return normalized
     
@@ -182,21 +198,12 @@ class OutputNormalizer:
         Returns:
             Overall status
         """
-        # Check for errors first
-        if normalized_output.get('errors'):
-            return 'error'
-        
-        # Check validation status
-        validation = normalized_output.get('validation', {})
-        if not validation.get('is_valid', True):
-            return 'validation_failed'
-        
-        # Check classification status
-        classification = normalized_output.get('classification', {})
-        if classification.get('category') in ['unsafe', 'inappropriate', 'hate_speech', 'violence', 'adult_content']:
-            return 'content_flagged'
-        
-        return 'success'
+        has_errors = bool(normalized_output.get('errors'))
+        invalid = not normalized_output.get('validation', {}).get('is_valid', True)
+        category = normalized_output.get('classification', {}).get('category')
+        # Malformed replies can carry lists or dicts, which a frozenset can't hash
+        flagged = isinstance(category, str) and category in FLAGGED_CATEGORIES
+        return _STATUS_TABLE[has_errors << 2 | invalid << 1 | flagged]
     
     def _create_error_output(self, error_message: str) -> Dict[str, Any]:
         """
@@ -304,18 +311,28 @@ class OutputNormalizer:
         """
         Convert normalized output to JSON string.
         
+        Serialization uses orjson, which differs from the stdlib json module
+        in two ways: it only supports 2-space indentation, and NaN and
+        infinite floats are written as null. Non-string dict keys are
+        converted to strings, as json.dumps does.
+        
         Args:
             normalized_output: Normalized output
-            indent: JSON indentation
+            indent: JSON indentation; 0 for compact output, any other value
+                indents by 2 spaces
             
         Returns:
             JSON string
         """
+        # orjson serializes datetimes as ISO 8601 itself; other objects fall back to str
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
         try:
-            return json.dumps(normalized_output, indent=indent, default=str)
+            return orjson.dumps(normalized_output, default=str, option=option).decode()
         except Exception as e:
             logger.error(f"Error converting to JSON: {str(e)}")
-            return json.dumps(self._create_error_output(str(e)), indent=indent, default=str)
+            return orjson.dumps(self._create_error_output(str(e)), default=str, option=option).decode()
     
     def from_json(self, json_string: str) -> Dict[str, Any]:
         """
@@ -328,7 +345,7 @@ class OutputNormalizer:
             Normalized output
         """
         try:
-            data = json.loads(json_string)
+            data = orjson.loads(json_string)
             return self.normalize(data)
         except Exception as e:
             logger.error(f"Error parsing JSON: {str(e)}")
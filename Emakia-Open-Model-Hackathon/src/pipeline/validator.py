@@ -5,10 +5,13 @@ This module provides content validation functionality using AI models and rule-b
 """
 
 import asyncio
-from typing import Dict, Any, List, Optional
+import functools
+import time
+from typing import Dict, Any, List, Optional, Set, Tuple
+import orjson
 from loguru import logger
 
-from src.wrappers import OpenAIWrapper, FireworksWrapper, GPTOSSWrapper, LlamaWrapper
+from src.wrappers import BaseModelWrapper, OpenAIWrapper, FireworksWrapper, GPTOSSWrapper, LlamaWrapper
 from src.config.model_config import get_model_config
 
 
@@ -28,6 +31,20 @@ class Validator:
         self.validation_config = config.get('validation', {})
         self.model_wrappers = {}
         
+        # Circuit breaker settings for AI providers
+        self.breaker_threshold = self.validation_config.get('circuit_breaker_threshold', 5)
+        self.breaker_cooldown = self.validation_config.get('circuit_breaker_cooldown', 30.0)
+        self._failure_counts = {}
+        self._last_failure = {}
+        self._open_until = {}
+        
+        # Calls still running per provider, cancelled when its circuit opens
+        self._inflight_calls: Dict[str, Set[asyncio.Future]] = {}
+        self._tripped_calls: Set[asyncio.Future] = set()
+        
+        # Formatted rules per content type, cached per instance
+        self._get_rules_prompt = functools.lru_cache(maxsize=8)(self._build_rules_prompt)
+        
         # Initialize model wrappers
         self._initialize_wrappers()
         
@@ -107,17 +124,18 @@ class Validator:
             # Check length
             min_length = content_rules.get('min_length', 10)
             max_length = content_rules.get('max_length', 10000)
+            length = len(content)
             
-            if len(content) < min_length:
+            if length < min_length:
                 violations.append(f"Content too short (minimum {min_length} characters)")
                 suggestions.append("Add more content to meet minimum length requirement")
             
-            if len(content) > max_length:
+            if length > max_length:
                 violations.append(f"Content too long (maximum {max_length} characters)")
                 suggestions.append("Reduce content length to meet maximum requirement")
             
-            # Check for empty content
-            if not content.strip():
+            # Check for empty content; isspace() scans in place instead of copying like strip()
+            if not content or content.isspace():
                 violations.append("Content is empty or contains only whitespace")
                 suggestions.append("Provide meaningful content")
         
@@ -140,8 +158,8 @@ class Validator:
         Returns:
             AI validation results
         """
-        # Define validation rules based on content type
-        validation_rules = self._get_validation_rules(content_type)
+        # Get pre-formatted validation rules for the content type
+        rules_prompt, rules_checked = self._get_rules_prompt(content_type)
         
         # Get default model provider
         default_provider = self.config.get('models', {}).get('default', 'openai')
@@ -160,9 +178,19 @@ class Validator:
                 }
             default_provider = available_providers[0]
         
+        # Skip providers whose circuit is open
+        if time.monotonic() < self._open_until.get(default_provider, 0.0):
+            logger.warning(f"Circuit open for {default_provider}, skipping AI validation")
+            return self._circuit_open_result(default_provider)
+        
+        wrapper = self.model_wrappers[default_provider]
+        # Wrappers retry transient errors themselves on each model call
+        call = asyncio.ensure_future(wrapper.validate_with_prompt(content, rules_prompt, rules_checked))
+        inflight = self._inflight_calls.setdefault(default_provider, set())
+        inflight.add(call)
         try:
-            wrapper = self.model_wrappers[default_provider]
-            result = await wrapper.validate(content, validation_rules)
+            result = await call
+            self._failure_counts[default_provider] = 0
             
             # Add validation type
             result['validation_type'] = 'ai_model'
@@ -170,8 +198,15 @@ class Validator:
             
             return result
             
+        except asyncio.CancelledError:
+            # Stopped because the circuit opened mid-call, not by our caller
+            if call not in self._tripped_calls:
+                raise
+            return self._circuit_open_result(default_provider)
+            
         except Exception as e:
             logger.error(f"AI validation failed: {str(e)}")
+            self._record_failure(default_provider)
             return {
                 'is_valid': False,
                 'violations': [f'AI validation failed: {str(e)}'],
@@ -180,6 +215,71 @@ class Validator:
                 'validation_type': 'ai_error',
                 'model_provider': default_provider
             }
+            
+        finally:
+            inflight.discard(call)
+            self._tripped_calls.discard(call)
+    
+    @staticmethod
+    def _circuit_open_result(provider: str) -> Dict[str, Any]:
+        """
+        Build the result for content skipped because a provider's circuit is open.
+        
+        Args:
+            provider: Model provider name
+            
+        Returns:
+            AI validation error results
+        """
+        return {
+            'is_valid': False,
+            'violations': [f'AI provider {provider} temporarily unavailable'],
+            'suggestions': ['Try again later or use different model'],
+            'confidence': 0.0,
+            'validation_type': 'ai_error',
+            'model_provider': provider
+        }
+    
+    def _record_failure(self, provider: str) -> None:
+        """
+        Record a provider failure and open its circuit once the threshold is reached.
+        
+        Failures only count towards the threshold while each follows the
+        previous one within ``breaker_cooldown`` seconds.
+        
+        Args:
+            provider: Model provider name
+        """
+        now = time.monotonic()
+        if now - self._last_failure.get(provider, now) > self.breaker_cooldown:
+            self._failure_counts[provider] = 0
+        self._last_failure[provider] = now
+        
+        failures = self._failure_counts.get(provider, 0) + 1
+        self._failure_counts[provider] = failures
+        
+        if failures >= self.breaker_threshold:
+            self._open_until[provider] = now + self.breaker_cooldown
+            self._failure_counts[provider] = 0
+            logger.warning(f"Circuit opened for {provider} for {self.breaker_cooldown} seconds")
+            
+            # Items gathered in the same batch already passed the open check
+            for call in self._inflight_calls.get(provider, ()):
+                if call.cancel():
+                    self._tripped_calls.add(call)
+    
+    def _build_rules_prompt(self, content_type: str) -> Tuple[str, Tuple[str, ...]]:
+        """
+        Get validation rules for a content type, formatted for model prompts.
+        
+        Args:
+            content_type: Type of content
+            
+        Returns:
+            Tuple of the formatted rules and the rule names
+        """
+        validation_rules = self._get_validation_rules(content_type)
+        return BaseModelWrapper.format_rules(validation_rules), tuple(validation_rules.keys())
     
     def _get_validation_rules(self, content_type: str) -> Dict[str, str]:
         """
@@ -260,6 +360,18 @@ class Validator:
             'timestamp': asyncio.get_event_loop().time()
         }
     
+    def to_json(self, result: Dict[str, Any]) -> bytes:
+        """
+        Serialize validation results to JSON.
+        
+        Args:
+            result: Validation results
+            
+        Returns:
+            UTF-8 encoded JSON bytes
+        """
+        return orjson.dumps(result, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    
     def health_check(self) -> Dict[str, Any]:
         """
         Perform health check on validator.
@@ -301,8 +413,10 @@ class Validator:
         """
         logger.info(f"Starting batch validation of {len(contents)} items")
         
+        # Bind hot attributes once for large batches
+        validate = self.validate
         tasks = [
-            self.validate(content, content_type) 
+            validate(content, content_type) 
             for content in contents
         ]
         
@@ -310,11 +424,13 @@ class Validator:
         
         # Filter out exceptions and log them
         valid_results = []
+        append_result = valid_results.append
+        log_error = logger.error
         for i, result in enumerate(results):
             if isinstance(result, Exception):
-                logger.error(f"Error validating item {i}: {str(result)}")
+                log_error(f"Error validating item {i}: {str(result)}")
             else:
-                valid_results.append(result)
+                append_result(result)
         
         logger.info(f"Batch validation completed. {len(valid_results)}/{len(contents)} successful")
         return valid_results
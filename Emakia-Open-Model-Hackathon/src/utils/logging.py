@@ -5,11 +5,22 @@ This module provides centralized logging configuration and utilities.
 """
 
 import os
+import reprlib
 import sys
 from pathlib import Path
 from typing import Optional
+import orjson
 from loguru import logger
 
+# Longest argument repr written by the call logging decorators
+MAX_REPR_LENGTH = 200
+
+# Abbreviates long strings and containers while building the repr, so large
+# payloads are never fully rendered just to be truncated
+_SHORT_REPR = reprlib.Repr()
+_SHORT_REPR.maxstring = MAX_REPR_LENGTH
+_SHORT_REPR.maxother = MAX_REPR_LENGTH
+
 
 def setup_logging(
     log_level: str = "INFO",
@@ -17,7 +28,8 @@ def setup_logging(
     log_format: Optional[str] = None,
     max_size: str = "10 MB",
     rotation: str = "1 day",
-    retention: str = "30 days"
+    retention: str = "30 days",
+    serialize: bool = False
 ) -> None:
     """
     Setup logging configuration for the application.
@@ -29,6 +41,7 @@ def setup_logging(
         max_size: Maximum size of log file before rotation
         rotation: Log rotation frequency
         retention: How long to keep log files
+        serialize: Write the file log as JSON lines instead of formatted text
     """
     # Remove default logger
     logger.remove()
@@ -53,16 +66,45 @@ def setup_logging(
         
         logger.add(
             log_file,
-            format=log_format,
+            format=_serialize_record if serialize else log_format,
             level=log_level,
             rotation=rotation,
             retention=retention,
-            compression="zip"
+            compression="zip",
+            enqueue=True  # Write from a background thread so callers never block on disk I/O
         )
     
     logger.info(f"Logging configured with level: {log_level}")
 
 
+def _serialize_record(record) -> str:
+    """
+    Format a log record as a JSON line using orjson.
+    
+    Args:
+        record: Loguru record dictionary
+        
+    Returns:
+        Format string referencing the serialized record
+    """
+    extra = {key: value for key, value in record['extra'].items() if key != 'serialized'}
+    payload = {
+        'time': record['time'].isoformat(),
+        'level': record['level'].name,
+        'name': record['name'],
+        'function': record['function'],
+        'line': record['line'],
+        'message': record['message'],
+        'extra': extra
+    }
+    
+    if record['exception'] is not None:
+        payload['exception'] = str(record['exception'].value)
+    
+    record['extra']['serialized'] = orjson.dumps(payload, default=str).decode()
+    return "{extra[serialized]}\n"
+
+
 def get_logger(name: str = None):
     """
     Get a logger instance.
@@ -90,6 +132,35 @@ def set_log_level(level: str) -> None:
     logger.info(f"Log level changed to: {level}")
 
 
+def _repr_short(value) -> str:
+    """
+    Build a bounded representation of a value for debug logs.
+    
+    Args:
+        value: Value to represent
+        
+    Returns:
+        The value's repr, with long strings and containers abbreviated
+    """
+    return _SHORT_REPR.repr(value)
+
+
+def _format_call_args(args, kwargs) -> str:
+    """
+    Format call arguments for debug logs without copying large payloads.
+    
+    Args:
+        args: Positional arguments
+        kwargs: Keyword arguments
+        
+    Returns:
+        Formatted argument summary
+    """
+    parts = [_repr_short(arg) for arg in args]
+    parts.extend(f"{key}={_repr_short(value)}" for key, value in kwargs.items())
+    return ", ".join(parts)
+
+
 def log_function_call(func):
     """
     Decorator to log function calls.
@@ -101,13 +172,15 @@ def log_function_call(func):
         Decorated function
     """
     def wrapper(*args, **kwargs):
-        logger.debug(f"Calling {func.__name__} with args: {args}, kwargs: {kwargs}")
+        logger.opt(lazy=True).debug(
+            "Calling {}({})", lambda: func.__qualname__, lambda: _format_call_args(args, kwargs)
+        )
         try:
             result = func(*args, **kwargs)
-            logger.debug(f"{func.__name__} returned: {result}")
+            logger.opt(lazy=True).debug("{} returned: {}", lambda: func.__qualname__, lambda: _repr_short(result))
             return result
         except Exception as e:
-            logger.error(f"{func.__name__} failed with error: {str(e)}")
+            logger.error(f"{func.__qualname__} failed with error: {str(e)}")
             raise
     
     return wrapper
@@ -124,13 +197,15 @@ def log_async_function_call(func):
         Decorated async function
     """
     async def wrapper(*args, **kwargs):
-        logger.debug(f"Calling async {func.__name__} with args: {args}, kwargs: {kwargs}")
+        logger.opt(lazy=True).debug(
+            "Calling async {}({})", lambda: func.__qualname__, lambda: _format_call_args(args, kwargs)
+        )
         try:
             result = await func(*args, **kwargs)
-            logger.debug(f"Async {func.__name__} returned: {result}")
+            logger.opt(lazy=True).debug("Async {} completed", lambda: func.__qualname__)
             return result
         except Exception as e:
-            logger.error(f"Async {func.__name__} failed with error: {str(e)}")
+            logger.error(f"Async {func.__qualname__} failed with error: {str(e)}")
             raise
     
     return wrapper
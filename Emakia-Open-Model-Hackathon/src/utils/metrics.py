@@ -4,41 +4,114 @@ Metrics utilities for the Emakia Validator Agent.
 This module provides functionality for collecting and monitoring application metrics.
 """
 
+import csv
+import io
+import itertools
 import time
 import threading
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
 from collections import defaultdict, deque
-from datetime import datetime, timedelta
+from datetime import datetime
+import orjson
 from loguru import logger
 
 
+class ValidationRecord(NamedTuple):
+    """A single recorded validation."""
+    timestamp: float
+    content_type: str
+    is_valid: bool
+    confidence: float
+    model_provider: str
+    violations_count: int
+    processing_time: float
+
+
+class ClassificationRecord(NamedTuple):
+    """A single recorded classification."""
+    timestamp: float
+    content_type: str
+    category: str
+    confidence: float
+    model_provider: str
+    threshold_met: bool
+    processing_time: float
+
+
+class ErrorRecord(NamedTuple):
+    """A single recorded error."""
+    timestamp: float
+    error_type: str
+    error_message: str
+    context: Dict[str, Any]
+
+
+class PerformanceRecord(NamedTuple):
+    """A single recorded operation timing."""
+    timestamp: float
+    operation: str
+    duration: float
+    metadata: Dict[str, Any]
+
+
 class MetricsCollector:
     """
     Collects and manages application metrics.
     """
     
-    def __init__(self, max_history: int = 1000):
+    def __init__(self, max_history: int = 1000, window_hours: int = 24, summary_ttl: float = 1.0):
         """
         Initialize the metrics collector.
         
         Args:
             max_history: Maximum number of historical records to keep
+            window_hours: Number of hours of per-minute aggregates to keep for summaries
+            summary_ttl: Seconds a computed summary or health check is served
+                before it is recomputed; 0 disables caching
         """
         self.max_history = max_history
-        self.lock = threading.Lock()
+        self.window_hours = window_hours
+        self.summary_ttl = summary_ttl
         
-        # Metrics storage
-        self.validation_metrics = defaultdict(list)
-        self.classification_metrics = defaultdict(list)
-        self.error_metrics = defaultdict(list)
-        self.performance_metrics = defaultdict(list)
+        # One lock per metric family so writers and readers of different
+        # families never contend with each other
+        self._locks = {
+            'validation': threading.Lock(),
+            'classification': threading.Lock(),
+            'error': threading.Lock(),
+            'performance': threading.Lock(),
+            'timer': threading.Lock(),
+            'counter': threading.Lock()
+        }
         
-        # Counters
-        self.counters = defaultdict(int)
+        # Metrics storage (bounded ring buffers per key)
+        self.validation_metrics = defaultdict(self._new_history)
+        self.classification_metrics = defaultdict(self._new_history)
+        self.error_metrics = defaultdict(self._new_history)
+        self.performance_metrics = defaultdict(self._new_history)
         
-        # Timers
+        # Running per-minute aggregates so summaries never rescan records
+        self.validation_aggregates = defaultdict(self._new_buckets)
+        self.classification_aggregates = defaultdict(self._new_buckets)
+        self.performance_aggregates = defaultdict(self._new_buckets)
+        
+        # Counters, sharded per thread so increments need no lock; the
+        # 'counter' lock only guards adding, listing and clearing shards
+        self._counter_shards = defaultdict(lambda: defaultdict(int))
+        
+        # Counter names composed once per content type or category
+        self._validation_keys = {}
+        self._classification_keys = {}
+        
+        # Timers, keyed by a monotonic sequence id
+        self._timer_seq = itertools.count()
         self.timers = {}
         
+        # (expiry, value) snapshots so frequent scrapes do not rescan metrics;
+        # writes do not invalidate them, so they lag by at most summary_ttl
+        self._summary_cache = {}
+        self._health_cache = None
+        
         logger.info("Metrics collector initialized")
     
     def record_validation(self, content_type: str, result: Dict[str, Any]) -> None:
@@ -49,27 +122,33 @@ class MetricsCollector:
             content_type: Type of content validated
             result: Validation result
         """
-        with self.lock:
-            timestamp = datetime.now()
-            metric = {
-                'timestamp': timestamp,
-                'content_type': content_type,
-                'is_valid': result.get('validation', {}).get('is_valid', False),
-                'confidence': result.get('validation', {}).get('confidence', 0.0),
-                'model_provider': result.get('validation', {}).get('model_provider', 'unknown'),
-                'violations_count': len(result.get('validation', {}).get('violations', [])),
-                'processing_time': result.get('metadata', {}).get('processing_time', 0.0)
-            }
-            
+        timestamp = time.time()
+        validation = result.get('validation', {})
+        metric = ValidationRecord(
+            timestamp,
+            content_type,
+            validation.get('is_valid', False),
+            validation.get('confidence', 0.0),
+            validation.get('model_provider', 'unknown'),
+            len(validation.get('violations', [])),
+            result.get('metadata', {}).get('processing_time', 0.0)
+        )
+        
+        with self._locks['validation']:
             self.validation_metrics[content_type].append(metric)
-            self._trim_history(self.validation_metrics[content_type])
             
-            # Update counters
-            self.counters[f'validations_{content_type}'] += 1
-            if metric['is_valid']:
-                self.counters[f'valid_validations_{content_type}'] += 1
-            else:
-                self.counters[f'invalid_validations_{content_type}'] += 1
+            bucket = self._current_bucket(
+                self.validation_aggregates[content_type], timestamp, self._new_validation_bucket
+            )
+            bucket['count'] += 1
+            if metric.is_valid:
+                bucket['valid_count'] += 1
+            bucket['sum_confidence'] += metric.confidence
+            bucket['sum_processing_time'] += metric.processing_time
+        
+        # Update counters
+        keys = self._validation_keys.get(content_type) or self._build_validation_keys(content_type)
+        self._increment(keys[0], keys[1] if metric.is_valid else keys[2])
     
     def record_classification(self, content_type: str, result: Dict[str, Any]) -> None:
         """
@@ -79,24 +158,31 @@ class MetricsCollector:
             content_type: Type of content classified
             result: Classification result
         """
-        with self.lock:
-            timestamp = datetime.now()
-            metric = {
-                'timestamp': timestamp,
-                'content_type': content_type,
-                'category': result.get('classification', {}).get('category', 'unknown'),
-                'confidence': result.get('classification', {}).get('confidence', 0.0),
-                'model_provider': result.get('classification', {}).get('model_provider', 'unknown'),
-                'threshold_met': result.get('classification', {}).get('threshold_met', False),
-                'processing_time': result.get('metadata', {}).get('processing_time', 0.0)
-            }
-            
+        timestamp = time.time()
+        classification = result.get('classification', {})
+        metric = ClassificationRecord(
+            timestamp,
+            content_type,
+            classification.get('category', 'unknown'),
+            classification.get('confidence', 0.0),
+            classification.get('model_provider', 'unknown'),
+            classification.get('threshold_met', False),
+            result.get('metadata', {}).get('processing_time', 0.0)
+        )
+        
+        with self._locks['classification']:
             self.classification_metrics[content_type].append(metric)
-            self._trim_history(self.classification_metrics[content_type])
             
-            # Update counters
-            self.counters[f'classifications_{content_type}'] += 1
-            self.counters[f'classifications_{metric["category"]}'] += 1
+            bucket = self._current_bucket(
+                self.classification_aggregates[content_type], timestamp, self._new_classification_bucket
+            )
+            bucket['count'] += 1
+            bucket['sum_confidence'] += metric.confidence
+            bucket['sum_processing_time'] += metric.processing_time
+            bucket['categories'][metric.category] += 1
+        
+        # Update counters
+        self._increment(self._classification_key(content_type), self._classification_key(metric.category))
     
     def record_error(self, error_type: str, error_message: str, context: Dict[str, Any] = None) -> None:
         """
@@ -107,21 +193,13 @@ class MetricsCollector:
             error_message: Error message
             context: Additional context
         """
-        with self.lock:
-            timestamp = datetime.now()
-            metric = {
-                'timestamp': timestamp,
-                'error_type': error_type,
-                'error_message': error_message,
-                'context': context or {}
-            }
-            
+        metric = ErrorRecord(time.time(), error_type, error_message, context or {})
+        
+        with self._locks['error']:
             self.error_metrics[error_type].append(metric)
-            self._trim_history(self.error_metrics[error_type])
-            
-            # Update counters
-            self.counters[f'errors_{error_type}'] += 1
-            self.counters['total_errors'] += 1
+        
+        # Update counters
+        self._increment(f'errors_{error_type}', 'total_errors')
     
     def record_performance(self, operation: str, duration: float, metadata: Dict[str, Any] = None) -> None:
         """
@@ -132,22 +210,96 @@ class MetricsCollector:
             duration: Duration in seconds
             metadata: Additional metadata
         """
-        with self.lock:
-            timestamp = datetime.now()
-            metric = {
-                'timestamp': timestamp,
-                'operation': operation,
-                'duration': duration,
-                'metadata': metadata or {}
-            }
-            
+        timestamp = time.time()
+        metric = PerformanceRecord(timestamp, operation, duration, metadata or {})
+        
+        with self._locks['performance']:
             self.performance_metrics[operation].append(metric)
-            self._trim_history(self.performance_metrics[operation])
             
-            # Update counters
-            self.counters[f'operations_{operation}'] += 1
+            bucket = self._current_bucket(
+                self.performance_aggregates[operation], timestamp, self._new_performance_bucket
+            )
+            bucket['count'] += 1
+            bucket['sum_duration'] += duration
+            bucket['min_duration'] = min(bucket['min_duration'], duration)
+            bucket['max_duration'] = max(bucket['max_duration'], duration)
+        
+        # Update counters
+        self._increment(f'operations_{operation}')
     
-    def start_timer(self, operation: str) -> str:
+    def _build_validation_keys(self, content_type: str) -> Tuple[str, str, str]:
+        """
+        Compose and cache the validation counter names for a content type.
+        
+        Args:
+            content_type: Type of content validated
+            
+        Returns:
+            Total, valid and invalid counter names
+        """
+        keys = (
+            f'validations_{content_type}',
+            f'valid_validations_{content_type}',
+            f'invalid_validations_{content_type}'
+        )
+        self._validation_keys[content_type] = keys
+        return keys
+    
+    def _classification_key(self, name: str) -> str:
+        """
+        Get the cached classification counter name for a content type or category.
+        
+        Args:
+            name: Content type or category
+            
+        Returns:
+            Counter name
+        """
+        key = self._classification_keys.get(name)
+        if key is None:
+            key = self._classification_keys[name] = f'classifications_{name}'
+        return key
+    
+    def _increment(self, *keys: str) -> None:
+        """
+        Increment counters in the calling thread's shard.
+        
+        Args:
+            *keys: Counter names to increment
+        """
+        ident = threading.get_ident()
+        shard = self._counter_shards.get(ident)
+        if shard is None:
+            with self._locks['counter']:
+                shard = self._counter_shards[ident]
+        for key in keys:
+            shard[key] += 1
+    
+    def _invalidate_cache(self) -> None:
+        """
+        Drop cached summaries and health checks.
+        """
+        self._summary_cache.clear()
+        self._health_cache = None
+    
+    @property
+    def counters(self) -> Dict[str, int]:
+        """
+        Get counter totals aggregated across all thread shards.
+        
+        Returns:
+            Counter values keyed by name
+        """
+        with self._locks['counter']:
+            shards = list(self._counter_shards.values())
+        
+        totals = defaultdict(int)
+        for shard in shards:
+            for key, value in dict(shard).items():
+                totals[key] += value
+        return dict(totals)
+    
+    def start_timer(self, operation: str) -> int:
         """
         Start a timer for an operation.
         
@@ -157,11 +309,12 @@ class MetricsCollector:
         Returns:
             Timer ID
         """
-        timer_id = f"{operation}_{int(time.time() * 1000)}"
-        self.timers[timer_id] = time.time()
+        timer_id = next(self._timer_seq)
+        with self._locks['timer']:
+            self.timers[timer_id] = (operation, time.monotonic())
         return timer_id
     
-    def stop_timer(self, timer_id: str) -> Optional[float]:
+    def stop_timer(self, timer_id: int) -> Optional[float]:
         """
         Stop a timer and return duration.
         
@@ -171,138 +324,254 @@ class MetricsCollector:
         Returns:
             Duration in seconds, or None if timer not found
         """
-        if timer_id in self.timers:
-            start_time = self.timers.pop(timer_id)
-            duration = time.time() - start_time
-            self.record_performance(timer_id.split('_')[0], duration)
-            return duration
-        return None
+        with self._locks['timer']:
+            timer = self.timers.pop(timer_id, None)
+        if timer is None:
+            return None
+        
+        operation, start_time = timer
+        duration = time.monotonic() - start_time
+        self.record_performance(operation, duration)
+        return duration
     
     def get_summary(self, hours: int = 24) -> Dict[str, Any]:
         """
         Get metrics summary for the specified time period.
         
+        Results are cached for ``summary_ttl`` seconds per period. Callers get
+        a shallow copy, so nested values must be treated as read-only.
+        
         Args:
             hours: Number of hours to include in summary
             
         Returns:
             Metrics summary
         """
-        with self.lock:
-            cutoff_time = datetime.now() - timedelta(hours=hours)
-            
-            summary = {
-                'period_hours': hours,
-                'timestamp': datetime.now().isoformat(),
-                'counters': dict(self.counters),
-                'validation_summary': self._get_validation_summary(cutoff_time),
-                'classification_summary': self._get_classification_summary(cutoff_time),
-                'error_summary': self._get_error_summary(cutoff_time),
-                'performance_summary': self._get_performance_summary(cutoff_time)
-            }
+        cached = self._summary_cache.get(hours)
+        if cached is not None and cached[0] > time.monotonic():
+            return dict(cached[1])
+        
+        cutoff_time = time.time() - hours * 3600
+        
+        summary = {
+            'period_hours': hours,
+            'timestamp': datetime.now().isoformat(),
+            'counters': self.counters,
+            'validation_summary': self._get_validation_summary(cutoff_time),
+            'classification_summary': self._get_classification_summary(cutoff_time),
+            'error_summary': self._get_error_summary(
+                self._snapshot('error', self.error_metrics), cutoff_time
+            ),
+            'performance_summary': self._get_performance_summary(cutoff_time)
+        }
+        
+        if self.summary_ttl > 0:
+            self._summary_cache[hours] = (time.monotonic() + self.summary_ttl, summary)
+            return dict(summary)
+        return summary
+    
+    def _snapshot(self, family: str, metrics_store: Dict[str, deque]) -> Dict[str, List[NamedTuple]]:
+        """
+        Copy a metric family's records under its lock.
+        
+        Args:
+            family: Metric family name
+            metrics_store: Records keyed by content type, error type or operation
             
-            return summary
+        Returns:
+            Copied records
+        """
+        with self._locks[family]:
+            return {key: list(metrics) for key, metrics in metrics_store.items()}
     
-    def _get_validation_summary(self, cutoff_time: datetime) -> Dict[str, Any]:
+    def _get_validation_summary(self, cutoff_time: float) -> Dict[str, Any]:
         """Get validation metrics summary."""
         summary = {}
         
-        for content_type, metrics in self.validation_metrics.items():
-            recent_metrics = [m for m in metrics if m['timestamp'] >= cutoff_time]
-            
-            if recent_metrics:
-                total = len(recent_metrics)
-                valid_count = sum(1 for m in recent_metrics if m['is_valid'])
-                avg_confidence = sum(m['confidence'] for m in recent_metrics) / total
-                avg_processing_time = sum(m['processing_time'] for m in recent_metrics) / total
+        with self._locks['validation']:
+            for content_type, buckets in self.validation_aggregates.items():
+                total = 0
+                valid_count = 0
+                sum_confidence = 0.0
+                sum_processing_time = 0.0
                 
-                summary[content_type] = {
-                    'total_validations': total,
-                    'valid_count': valid_count,
-                    'invalid_count': total - valid_count,
-                    'success_rate': valid_count / total if total > 0 else 0.0,
-                    'avg_confidence': avg_confidence,
-                    'avg_processing_time': avg_processing_time
-                }
+                for bucket in self._recent_buckets(buckets, cutoff_time):
+                    total += bucket['count']
+                    valid_count += bucket['valid_count']
+                    sum_confidence += bucket['sum_confidence']
+                    sum_processing_time += bucket['sum_processing_time']
+                
+                if total:
+                    summary[content_type] = {
+                        'total_validations': total,
+                        'valid_count': valid_count,
+                        'invalid_count': total - valid_count,
+                        'success_rate': valid_count / total,
+                        'avg_confidence': sum_confidence / total,
+                        'avg_processing_time': sum_processing_time / total
+                    }
         
         return summary
     
-    def _get_classification_summary(self, cutoff_time: datetime) -> Dict[str, Any]:
+    def _get_classification_summary(self, cutoff_time: float) -> Dict[str, Any]:
         """Get classification metrics summary."""
         summary = {}
         
-        for content_type, metrics in self.classification_metrics.items():
-            recent_metrics = [m for m in metrics if m['timestamp'] >= cutoff_time]
-            
-            if recent_metrics:
-                total = len(recent_metrics)
+        with self._locks['classification']:
+            for content_type, buckets in self.classification_aggregates.items():
+                total = 0
+                sum_confidence = 0.0
+                sum_processing_time = 0.0
                 category_counts = defaultdict(int)
-                avg_confidence = sum(m['confidence'] for m in recent_metrics) / total
-                avg_processing_time = sum(m['processing_time'] for m in recent_metrics) / total
                 
-                for metric in recent_metrics:
-                    category_counts[metric['category']] += 1
+                for bucket in self._recent_buckets(buckets, cutoff_time):
+                    total += bucket['count']
+                    sum_confidence += bucket['sum_confidence']
+                    sum_processing_time += bucket['sum_processing_time']
+                    for category, count in bucket['categories'].items():
+                        category_counts[category] += count
                 
-                summary[content_type] = {
-                    'total_classifications': total,
-                    'category_distribution': dict(category_counts),
-                    'avg_confidence': avg_confidence,
-                    'avg_processing_time': avg_processing_time
-                }
+                if total:
+                    summary[content_type] = {
+                        'total_classifications': total,
+                        'category_distribution': dict(category_counts),
+                        'avg_confidence': sum_confidence / total,
+                        'avg_processing_time': sum_processing_time / total
+                    }
         
         return summary
     
-    def _get_error_summary(self, cutoff_time: datetime) -> Dict[str, Any]:
+    def _get_error_summary(self, error_metrics: Dict[str, List[ErrorRecord]], cutoff_time: float) -> Dict[str, Any]:
         """Get error metrics summary."""
         summary = {}
         
-        for error_type, metrics in self.error_metrics.items():
-            recent_metrics = [m for m in metrics if m['timestamp'] >= cutoff_time]
+        for error_type, metrics in error_metrics.items():
+            recent_metrics = [m for m in metrics if m.timestamp >= cutoff_time]
             
             if recent_metrics:
+                # Last 5 errors; timestamps stay epoch floats until export
+                recent_errors = [
+                    {'ts': metric.timestamp, 'type': metric.error_type, 'msg': metric.error_message}
+                    for metric in recent_metrics[-5:]
+                ]
+                
                 summary[error_type] = {
                     'total_errors': len(recent_metrics),
-                    'recent_errors': recent_metrics[-5:]  # Last 5 errors
+                    'recent_errors': recent_errors
                 }
         
         return summary
     
-    def _get_performance_summary(self, cutoff_time: datetime) -> Dict[str, Any]:
+    def _get_performance_summary(self, cutoff_time: float) -> Dict[str, Any]:
         """Get performance metrics summary."""
         summary = {}
         
-        for operation, metrics in self.performance_metrics.items():
-            recent_metrics = [m for m in metrics if m['timestamp'] >= cutoff_time]
-            
-            if recent_metrics:
-                total = len(recent_metrics)
-                avg_duration = sum(m['duration'] for m in recent_metrics) / total
-                min_duration = min(m['duration'] for m in recent_metrics)
-                max_duration = max(m['duration'] for m in recent_metrics)
+        with self._locks['performance']:
+            for operation, buckets in self.performance_aggregates.items():
+                total = 0
+                sum_duration = 0.0
+                min_duration = float('inf')
+                max_duration = float('-inf')
                 
-                summary[operation] = {
-                    'total_operations': total,
-                    'avg_duration': avg_duration,
-                    'min_duration': min_duration,
-                    'max_duration': max_duration
-                }
+                for bucket in self._recent_buckets(buckets, cutoff_time):
+                    total += bucket['count']
+                    sum_duration += bucket['sum_duration']
+                    min_duration = min(min_duration, bucket['min_duration'])
+                    max_duration = max(max_duration, bucket['max_duration'])
+                
+                if total:
+                    summary[operation] = {
+                        'total_operations': total,
+                        'avg_duration': sum_duration / total,
+                        'min_duration': min_duration,
+                        'max_duration': max_duration
+                    }
         
         return summary
     
-    def _trim_history(self, metrics_list: List[Dict[str, Any]]) -> None:
-        """Trim metrics history to maximum size."""
-        if len(metrics_list) > self.max_history:
-            metrics_list[:] = metrics_list[-self.max_history:]
+    def _new_history(self) -> deque:
+        """Create a metrics history buffer that evicts the oldest records."""
+        return deque(maxlen=self.max_history)
+    
+    def _new_buckets(self) -> deque:
+        """Create a ring of per-minute aggregates covering the summary window."""
+        return deque(maxlen=self.window_hours * 60)
+    
+    @staticmethod
+    def _new_validation_bucket() -> Dict[str, Any]:
+        """Create an empty per-minute validation aggregate."""
+        return {'count': 0, 'valid_count': 0, 'sum_confidence': 0.0, 'sum_processing_time': 0.0}
+    
+    @staticmethod
+    def _new_classification_bucket() -> Dict[str, Any]:
+        """Create an empty per-minute classification aggregate."""
+        return {'count': 0, 'sum_confidence': 0.0, 'sum_processing_time': 0.0, 'categories': defaultdict(int)}
+    
+    @staticmethod
+    def _new_performance_bucket() -> Dict[str, Any]:
+        """Create an empty per-minute performance aggregate."""
+        return {'count': 0, 'sum_duration': 0.0, 'min_duration': float('inf'), 'max_duration': float('-inf')}
+    
+    @staticmethod
+    def _current_bucket(buckets: deque, timestamp: float, new_bucket) -> Dict[str, Any]:
+        """
+        Get the aggregate bucket for a timestamp's minute, creating it if needed.
+        
+        Args:
+            buckets: Per-minute aggregates, oldest first
+            timestamp: Record timestamp
+            new_bucket: Factory for an empty aggregate
+            
+        Returns:
+            Aggregate bucket to update
+        """
+        minute = int(timestamp // 60)
+        
+        # Records that arrive slightly out of order join the newest bucket
+        if buckets and buckets[-1]['minute'] >= minute:
+            return buckets[-1]
+        
+        bucket = new_bucket()
+        bucket['minute'] = minute
+        buckets.append(bucket)
+        return bucket
+    
+    @staticmethod
+    def _recent_buckets(buckets: deque, cutoff_time: float):
+        """
+        Iterate over aggregate buckets newer than the cutoff, newest first.
+        
+        Args:
+            buckets: Per-minute aggregates, oldest first
+            cutoff_time: Oldest timestamp to include
+            
+        Returns:
+            Iterator over matching buckets
+        """
+        cutoff_minute = int(cutoff_time // 60)
+        for bucket in reversed(buckets):
+            if bucket['minute'] < cutoff_minute:
+                break
+            yield bucket
     
     def reset_metrics(self) -> None:
         """Reset all metrics."""
-        with self.lock:
+        with self._locks['validation']:
             self.validation_metrics.clear()
+            self.validation_aggregates.clear()
+        with self._locks['classification']:
             self.classification_metrics.clear()
+            self.classification_aggregates.clear()
+        with self._locks['error']:
             self.error_metrics.clear()
+        with self._locks['performance']:
             self.performance_metrics.clear()
-            self.counters.clear()
+            self.performance_aggregates.clear()
+        with self._locks['counter']:
+            self._counter_shards.clear()
+        with self._locks['timer']:
             self.timers.clear()
+        self._invalidate_cache()
             
         logger.info("All metrics reset")
     
@@ -319,32 +588,76 @@ class MetricsCollector:
         summary = self.get_summary()
         
         if format.lower() == 'json':
-            import json
-            return json.dumps(summary, indent=2, default=str)
+            summary = {**summary, 'error_summary': self._format_error_timestamps(summary['error_summary'])}
+            return orjson.dumps(
+                summary,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+                default=str
+            ).decode()
         elif format.lower() == 'csv':
             # Simple CSV export for key metrics
-            lines = ['metric,value']
-            for key, value in summary['counters'].items():
-                lines.append(f'{key},{value}')
-            return '\n'.join(lines)
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            writer.writerow(['metric', 'value'])
+            writer.writerows(summary['counters'].items())
+            return buffer.getvalue()
         else:
             raise ValueError(f"Unsupported format: {format}")
     
+    @staticmethod
+    def _format_error_timestamps(error_summary: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Copy an error summary with recent error timestamps as ISO strings.
+        
+        Args:
+            error_summary: Error summary from get_summary
+            
+        Returns:
+            Error summary ready for export
+        """
+        return {
+            error_type: {
+                **info,
+                'recent_errors': [
+                    {**error, 'ts': datetime.fromtimestamp(error['ts']).isoformat()}
+                    for error in info['recent_errors']
+                ]
+            }
+            for error_type, info in error_summary.items()
+        }
+    
     def health_check(self) -> Dict[str, Any]:
         """
         Perform health check on metrics collector.
         
+        Results are cached for ``summary_ttl`` seconds.
+        
         Returns:
             Health status information
         """
-        with self.lock:
-            return {
-                'status': 'healthy',
-                'component': 'metrics_collector',
-                'total_metrics': sum(len(metrics) for metrics in self.validation_metrics.values()) +
-                               sum(len(metrics) for metrics in self.classification_metrics.values()) +
-                               sum(len(metrics) for metrics in self.error_metrics.values()) +
-                               sum(len(metrics) for metrics in self.performance_metrics.values()),
-                'active_timers': len(self.timers),
-                'counters_total': sum(self.counters.values())
-            }
+        cached = self._health_cache
+        if cached is not None and cached[0] > time.monotonic():
+            return dict(cached[1])
+        
+        total_metrics = 0
+        for family, metrics_store in (
+            ('validation', self.validation_metrics),
+            ('classification', self.classification_metrics),
+            ('error', self.error_metrics),
+            ('performance', self.performance_metrics)
+        ):
+            with self._locks[family]:
+                total_metrics += sum(len(metrics) for metrics in metrics_store.values())
+        
+        health = {
+            'status': 'healthy',
+            'component': 'metrics_collector',
+            'total_metrics': total_metrics,
+            'active_timers': len(self.timers),
+            'counters_total': sum(self.counters.values())
+        }
+        
+        if self.summary_ttl > 0:
+            self._health_cache = (time.monotonic() + self.summary_ttl, health)
+            return dict(health)
+        return health
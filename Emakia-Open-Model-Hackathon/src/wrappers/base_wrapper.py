@@ -5,9 +5,86 @@ This module defines the base interface that all model wrappers must implement.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Tuple
 import asyncio
+import functools
+import hashlib
+import re
+import textwrap
+import time
+import aiohttp
+import orjson
 from loguru import logger
+from openai import APIConnectionError
+from tenacity import AsyncRetrying, RetryCallState, retry_if_exception, stop_after_attempt, wait_exponential, wait_random
+
+# Upper bound in seconds for a single retry backoff
+MAX_RETRY_DELAY = 30
+
+# Prompt templates shared by the wrappers, split around the variable text
+# (which is inserted after a single space). They are dedented so no
+# indentation is sent to the model as extra input tokens.
+CLASSIFY_PROMPT_PREFIX = textwrap.dedent("""\
+    Classify the following text into one of these categories: {categories}
+    
+    Text:""")
+CLASSIFY_PROMPT_SUFFIX = textwrap.dedent("""
+    
+    Please respond with a JSON object containing:
+    1. "category": the most appropriate category
+    2. "confidence": confidence score between 0 and 1
+    3. "reasoning": brief explanation for the classification
+    
+    Response:""")
+VALIDATE_PROMPT_PREFIX = textwrap.dedent("""\
+    Validate the following content against these rules:
+    
+    {rules}
+    
+    Content:""")
+VALIDATE_PROMPT_SUFFIX = textwrap.dedent("""
+    
+    Please respond with a JSON object containing:
+    1. "is_valid": boolean indicating if content passes all rules
+    2. "violations": list of rule violations found
+    3. "confidence": confidence score between 0 and 1
+    4. "suggestions": suggestions for improvement
+    
+    Response:""")
+
+# Field patterns for recovering a classification from malformed JSON
+_CATEGORY_RE = re.compile(r'"category"\s*:\s*"([^"]+)"')
+_CONFIDENCE_RE = re.compile(r'"confidence"\s*:\s*([0-9]*\.?[0-9]+)')
+_REASONING_RE = re.compile(r'"reasoning"\s*:\s*"((?:[^"\\]|\\.)*)')
+
+
+@functools.lru_cache(maxsize=64)
+def classify_prompt_prefix(categories: Tuple[str, ...]) -> str:
+    """
+    Build the classification prompt header for a set of categories.
+    
+    Args:
+        categories: Possible categories, in prompt order
+        
+    Returns:
+        Prompt text up to the text being classified
+    """
+    return CLASSIFY_PROMPT_PREFIX.format(categories=", ".join(categories))
+
+
+@functools.lru_cache(maxsize=128)
+def _format_rules(rules_items: Tuple[Tuple[str, Any], ...]) -> str:
+    """
+    Format validation rule items as a bulleted list.
+    
+    Args:
+        rules_items: Rule name and description pairs, in prompt order
+        
+    Returns:
+        Rules as a bulleted list
+    """
+    return "\n".join([f"- {rule}: {desc}" for rule, desc in rules_items])
 
 
 class BaseModelWrapper(ABC):
@@ -31,6 +108,20 @@ class BaseModelWrapper(ABC):
         self.temperature = config.get('temperature', 0.1)
         self.timeout = config.get('timeout', 30)
         self.max_retries = config.get('max_retries', 3)
+        self.retry_delay = config.get('retry_delay', 1.0)
+        
+        # Caps concurrent outbound calls made through _generate
+        self._sem = asyncio.Semaphore(config.get('max_concurrent', 32))
+        
+        # Identical concurrent requests share one call, and results are kept
+        # in an LRU cache for result_cache_ttl seconds (0 disables reuse)
+        self._inflight: Dict[bytes, asyncio.Future] = {}
+        self._result_cache: OrderedDict = OrderedDict()
+        self.result_cache_size = config.get('result_cache_size', 10000)
+        self.result_cache_ttl = config.get('result_cache_ttl', 3600.0)
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._coalesced = 0
         
         logger.info(f"Initialized {self.__class__.__name__} with model: {self.model_name}")
     
@@ -63,6 +154,20 @@ class BaseModelWrapper(ABC):
         pass
     
     @abstractmethod
+    async def validate_with_prompt(self, content: str, rules_prompt: str, rules_checked: List[str]) -> Dict[str, Any]:
+        """
+        Validate content against rules already formatted for the prompt.
+        
+        Args:
+            content: Content to validate
+            rules_prompt: Validation rules formatted for the prompt
+            rules_checked: Names of the rules being checked
+            
+        Returns:
+            Validation results
+        """
+        pass
+    
     async def validate(self, content: str, validation_rules: Dict[str, Any]) -> Dict[str, Any]:
         """
         Validate content against specified rules.
@@ -74,7 +179,107 @@ class BaseModelWrapper(ABC):
         Returns:
             Validation results
         """
-        pass
+        rules_prompt = self.format_rules(validation_rules)
+        return await self.validate_with_prompt(content, rules_prompt, list(validation_rules.keys()))
+    
+    @staticmethod
+    def format_rules(validation_rules: Dict[str, Any]) -> str:
+        """
+        Format validation rules for inclusion in a prompt.
+        
+        Args:
+            validation_rules: Rules to format
+            
+        Returns:
+            Rules as a bulleted list
+        """
+        rules_items = tuple(validation_rules.items())
+        try:
+            return _format_rules(rules_items)
+        except TypeError:
+            # Unhashable rule descriptions can't be memoized
+            return _format_rules.__wrapped__(rules_items)
+    
+    @staticmethod
+    def parse_json_content(content: str) -> Any:
+        """
+        Parse a model reply as JSON, unwrapping a fenced code block if present.
+        
+        Args:
+            content: Raw model reply
+            
+        Returns:
+            Parsed JSON value
+            
+        Raises:
+            orjson.JSONDecodeError: If the reply is not valid JSON
+        """
+        if "```" in content:
+            content = content.split("```", 2)[1]
+            if content.startswith("json"):
+                content = content[4:]
+        return orjson.loads(content)
+    
+    @staticmethod
+    def salvage_classification(content: str) -> Optional[Dict[str, Any]]:
+        """
+        Recover classification fields from a reply that is not valid JSON.
+        
+        Args:
+            content: Raw model reply
+            
+        Returns:
+            Category, confidence and reasoning, or None if no category is found
+        """
+        category = _CATEGORY_RE.search(content)
+        if category is None:
+            return None
+        confidence = _CONFIDENCE_RE.search(content)
+        reasoning = _REASONING_RE.search(content)
+        return {
+            'category': category.group(1),
+            'confidence': min(float(confidence.group(1)), 1.0) if confidence else 0.0,
+            'reasoning': reasoning.group(1) if reasoning else ''
+        }
+    
+    async def _generate(
+        self, prompt: str, generate: Optional[Callable[..., Awaitable[Dict[str, Any]]]] = None, **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Issue a model call under the wrapper's concurrency cap, with retries.
+        
+        classify and validate go through here rather than calling generate
+        directly, so max_concurrent bounds every outbound request. Only
+        failures accepted by is_retryable are retried, up to max_retries
+        attempts with capped exponential backoff and jitter. The concurrency
+        slot is released while backing off so waiting callers do not block
+        others.
+        
+        Args:
+            prompt: Input prompt
+            generate: Generation method to call, defaults to generate
+            **kwargs: Additional parameters
+            
+        Returns:
+            Generated response
+        """
+        generate = generate or self.generate
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.max_retries),
+            wait=wait_exponential(multiplier=self.retry_delay, max=MAX_RETRY_DELAY) + wait_random(0, self.retry_delay),
+            retry=retry_if_exception(self.is_retryable),
+            before_sleep=self._log_retry,
+            reraise=True
+        )
+        
+        try:
+            async for attempt in retrying:
+                with attempt:
+                    async with self._sem:
+                        return await generate(prompt, **kwargs)
+        except Exception:
+            logger.error(f"Generation failed after {retrying.statistics.get('attempt_number', 1)} attempt(s)")
+            raise
     
     async def generate_with_retry(self, prompt: str, **kwargs) -> Dict[str, Any]:
         """
@@ -87,20 +292,128 @@ class BaseModelWrapper(ABC):
         Returns:
             Generated response
         """
-        last_exception = None
+        return await self._generate(prompt, **kwargs)
+    
+    @staticmethod
+    def _log_retry(retry_state: RetryCallState) -> None:
+        """
+        Log a failed attempt before backing off.
+        
+        Args:
+            retry_state: Tenacity state for the current call
+        """
+        logger.warning(f"Attempt {retry_state.attempt_number} failed: {str(retry_state.outcome.exception())}")
+    
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        """
+        Check whether a failed call is worth retrying.
+        
+        Shared by the wrappers and the validator so every layer agrees on
+        which failures are transient.
+        
+        Args:
+            error: Exception raised by a model call
+            
+        Returns:
+            True for timeouts, connection failures, rate limiting and server errors
+        """
+        # openai.APITimeoutError is a subclass of APIConnectionError
+        if isinstance(error, (asyncio.TimeoutError, APIConnectionError)):
+            return True
+        
+        # aiohttp exposes the HTTP status as `status`, the OpenAI SDK as `status_code`
+        status = getattr(error, 'status', None) or getattr(error, 'status_code', None)
+        if isinstance(status, int):
+            return status == 429 or status >= 500
+        
+        # Connection failures without a response, e.g. ServerDisconnectedError
+        return isinstance(error, (aiohttp.ClientError, ConnectionError))
+    
+    def _request_key(self, *parts: str) -> bytes:
+        """
+        Hash the model name and request inputs into a compact cache key.
+        
+        Args:
+            *parts: Request kind followed by its inputs
+            
+        Returns:
+            16-byte digest
+        """
+        return hashlib.blake2b("\x1f".join((self.model_name, *parts)).encode(), digest_size=16).digest()
+    
+    async def _coalesce(self, key: bytes, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Run a request once for all identical concurrent callers.
         
-        for attempt in range(self.max_retries):
-            try:
-                return await self.generate(prompt, **kwargs)
-            except Exception as e:
-                last_exception = e
-                logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
-                
-                if attempt < self.max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
+        Cache bookkeeping never awaits, so it needs no lock on the event loop.
+        Callers waiting on a request whose own caller was cancelled take over
+        and issue it themselves.
         
-        logger.error(f"All {self.max_retries} attempts failed")
-        raise last_exception
+        Args:
+            key: Request key from _request_key
+            call: Issues the request when no result is cached or in flight
+            
+        Returns:
+            A copy of the shared result, so callers may annotate it freely
+        """
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            if cached[0] > time.monotonic():
+                self._result_cache.move_to_end(key)
+                self._cache_hits += 1
+                return dict(cached[1])
+            del self._result_cache[key]
+        
+        future = self._inflight.get(key)
+        while future is not None:
+            # wait() leaves the shared future alone if this caller is cancelled
+            await asyncio.wait([future])
+            if not future.cancelled():
+                self._coalesced += 1
+                return dict(future.result())
+            future = self._inflight.get(key)
+        
+        self._cache_misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure does not warn on shutdown
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+        
+        future.set_result(result)
+        # Parse failures carry the raw reply and are worth asking again
+        if self.result_cache_ttl > 0 and 'raw_response' not in result:
+            self._result_cache[key] = (time.monotonic() + self.result_cache_ttl, result)
+            if len(self._result_cache) > self.result_cache_size:
+                self._result_cache.popitem(last=False)
+        return dict(result)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Get response cache statistics.
+        
+        Returns:
+            Cache size, hits, misses, hit rate and requests served by
+            joining an identical in-flight call
+        """
+        lookups = self._cache_hits + self._cache_misses
+        return {
+            'size': len(self._result_cache),
+            'hits': self._cache_hits,
+            'misses': self._cache_misses,
+            'hit_rate': self._cache_hits / lookups if lookups else 0.0,
+            'coalesced': self._coalesced
+        }
     
     def health_check(self) -> Dict[str, Any]:
         """
@@ -113,7 +426,8 @@ class BaseModelWrapper(ABC):
             'status': 'healthy',
             'provider': self.__class__.__name__,
             'model': self.model_name,
-            'config_loaded': bool(self.config)
+            'config_loaded': bool(self.config),
+            'response_cache': self.cache_stats()
         }
     
     def get_available_models(self) -> List[str]:
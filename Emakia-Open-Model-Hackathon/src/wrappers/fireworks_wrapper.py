@@ -5,11 +5,193 @@ This module provides a wrapper for Fireworks AI's API, implementing the base wra
 """
 
 import asyncio
-from typing import Dict, Any, List
+import functools
+import json
+import textwrap
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
 import aiohttp
+import orjson
 from loguru import logger
 
-from .base_wrapper import BaseModelWrapper
+from .base_wrapper import BaseModelWrapper, CLASSIFY_PROMPT_SUFFIX, VALIDATE_PROMPT_PREFIX, VALIDATE_PROMPT_SUFFIX, classify_prompt_prefix
+
+
+@functools.lru_cache(maxsize=64)
+def _batch_classify_prefix(categories: Tuple[str, ...]) -> str:
+    """
+    Build the batched classification prompt header for a set of categories.
+    
+    Args:
+        categories: Possible categories, in prompt order
+        
+    Returns:
+        Prompt text up to the numbered texts being classified
+    """
+    categories_str = ", ".join(categories)
+    return f"Classify each of the following numbered texts into one of these categories: {categories_str}\n\n"
+
+
+_BATCH_CLASSIFY_SUFFIX = textwrap.dedent("""
+    
+    Please respond with a JSON object containing "results": an array with one
+    entry per numbered text. Each entry contains:
+    1. "index": the number of the text it classifies
+    2. "category": the most appropriate category
+    3. "confidence": confidence score between 0 and 1
+    4. "reasoning": brief explanation for the classification
+    
+    Response:""")
+
+
+# Decodes the object starting at the first '{' in a reply that wraps its
+# JSON in prose, stopping at its closing brace whatever follows
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _extract_json(content: str) -> Any:
+    """
+    Parse a model reply as JSON, tolerating prose around the object.
+    
+    Args:
+        content: Raw model reply
+        
+    Returns:
+        Parsed JSON value
+        
+    Raises:
+        orjson.JSONDecodeError: If no parseable JSON object is found
+    """
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError as e:
+        start = content.find('{')
+        if start < 0:
+            raise
+        try:
+            return _JSON_DECODER.raw_decode(content, start)[0]
+        except ValueError:
+            raise e from None
+
+
+def _json_serialize(obj: Any) -> str:
+    """
+    Serialize request payloads with orjson for aiohttp.
+    
+    Args:
+        obj: JSON-serializable object
+        
+    Returns:
+        JSON string
+    """
+    return orjson.dumps(obj).decode()
+
+
+class FireworksBatcher:
+    """
+    Micro-batcher that coalesces concurrent classification requests.
+    
+    Requests arriving within ``batch_timeout_ms`` of each other, up to
+    ``batch_size`` of them, are sent to Fireworks as one numbered prompt and
+    the model's JSON array is split back out to the waiting callers by the
+    index each entry carries.
+    """
+    
+    def __init__(self, wrapper: 'FireworksWrapper', batch_size: int = 8, batch_timeout_ms: float = 10.0):
+        """
+        Initialize the batcher.
+        
+        Args:
+            wrapper: Wrapper used to issue the batched requests
+            batch_size: Maximum number of texts per request
+            batch_timeout_ms: How long to wait for a batch to fill
+        """
+        self.wrapper = wrapper
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight = set()
+    
+    async def submit(self, text: str, categories: List[str]) -> Dict[str, Any]:
+        """
+        Queue a text for classification and wait for its result.
+        
+        Args:
+            text: Text to classify
+            categories: List of possible categories
+            
+        Returns:
+            Classification results
+        """
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, tuple(categories), future))
+        return await future
+    
+    async def _run(self) -> None:
+        """
+        Drain the queue into batches and dispatch them.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_timeout
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Texts can only share a prompt when they share a category set
+            groups = defaultdict(list)
+            for item in batch:
+                groups[item[1]].append(item)
+            for categories, items in groups.items():
+                task = asyncio.create_task(self._dispatch(categories, items))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+    
+    async def _dispatch(self, categories: Tuple[str, ...], items: List[Tuple[str, Tuple[str, ...], asyncio.Future]]) -> None:
+        """
+        Classify one batch and resolve its callers' futures.
+        
+        Args:
+            categories: Category set shared by the batch
+            items: Queued (text, categories, future) entries
+        """
+        try:
+            if len(items) == 1:
+                results = [await self.wrapper._classify_one(items[0][0], list(categories))]
+            else:
+                results = await self.wrapper._classify_many([item[0] for item in items], list(categories))
+        except Exception as e:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, _, future), result in zip(items, results):
+            if not future.done():
+                future.set_result(result)
+    
+    async def close(self) -> None:
+        """
+        Stop the background batching task.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
 
 
 class FireworksWrapper(BaseModelWrapper):
@@ -37,17 +219,44 @@ class FireworksWrapper(BaseModelWrapper):
         self.base_url = "https://api.fireworks.ai/inference/v1"
         self.session = None
         
+        # Request constants, built once instead of on every call
+        self._endpoint = f"{self.base_url}/chat/completions"
+        self._headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        # sock_connect bounds only the TCP connect; aiohttp's `connect` would
+        # also count time spent queued for a free pooled connection
+        self._timeout = aiohttp.ClientTimeout(total=self.timeout, sock_connect=min(5, self.timeout))
+        
+        # Coalesce concurrent classify() calls unless batching is disabled
+        batch_size = config.get('batch_size', 8)
+        self._batcher = None
+        if batch_size > 1:
+            self._batcher = FireworksBatcher(self, batch_size, config.get('batch_timeout_ms', 10.0))
+        
         logger.info("Fireworks wrapper initialized successfully")
     
     async def _get_session(self) -> aiohttp.ClientSession:
         """
         Get or create aiohttp session.
         
+        The session is created lazily because aiohttp binds it to the running
+        event loop; its pooled connector keeps connections alive between calls.
+        
         Returns:
             aiohttp ClientSession
         """
         if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
+            # Every request goes to one host, so a per-host limit would be the
+            # effective cap; it stays off (0) unless configured
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=self.config.get('connection_limit_per_host', 0),
+                keepalive_timeout=60,
+                ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(connector=connector, json_serialize=_json_serialize)
         return self.session
     
     async def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
@@ -73,20 +282,15 @@ class FireworksWrapper(BaseModelWrapper):
                 **kwargs
             }
             
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
             # Make API call
             async with session.post(
-                f"{self.base_url}/chat/completions",
+                self._endpoint,
                 json=payload,
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=self.timeout)
+                headers=self._headers,
+                timeout=self._timeout
             ) as response:
                 response.raise_for_status()
-                data = await response.json()
+                data = await response.json(loads=orjson.loads)
                 
                 # Extract response
                 content = data['choices'][0]['message']['content']
@@ -117,6 +321,9 @@ class FireworksWrapper(BaseModelWrapper):
         """
         Classify text into predefined categories using Fireworks AI.
         
+        Duplicate requests share one call, and concurrent distinct calls are
+        coalesced into shared requests by the batcher.
+        
         Args:
             text: Text to classify
             categories: List of possible categories
@@ -124,28 +331,32 @@ class FireworksWrapper(BaseModelWrapper):
         Returns:
             Classification results
         """
-        # Create classification prompt
-        categories_str = ", ".join(categories)
-        prompt = f"""
-        Classify the following text into one of these categories: {categories_str}
-        
-        Text: {text}
-        
-        Please respond with a JSON object containing:
-        1. "category": the most appropriate category
-        2. "confidence": confidence score between 0 and 1
-        3. "reasoning": brief explanation for the classification
+        key = self._request_key('classify', text, *categories)
+        if self._batcher is not None:
+            return await self._coalesce(key, lambda: self._batcher.submit(text, categories))
+        return await self._coalesce(key, lambda: self._classify_one(text, categories))
+    
+    async def _classify_one(self, text: str, categories: List[str]) -> Dict[str, Any]:
+        """
+        Classify a single text with its own request.
         
-        Response:
+        Args:
+            text: Text to classify
+            categories: List of possible categories
+            
+        Returns:
+            Classification results
         """
+        # Create classification prompt
+        prefix = classify_prompt_prefix(tuple(categories))
+        prompt = f"{prefix} {text}{CLASSIFY_PROMPT_SUFFIX}"
         
         try:
-            response = await self.generate(prompt, temperature=0.1)
+            response = await self._generate(prompt, temperature=0.1)
             
             # Parse response (assuming JSON format)
-            import json
             try:
-                result = json.loads(response['content'])
+                result = _extract_json(response['content'])
                 return {
                     'category': result.get('category'),
                     'confidence': result.get('confidence', 0.0),
@@ -153,8 +364,17 @@ class FireworksWrapper(BaseModelWrapper):
                     'all_categories': categories,
                     'model': self.model_name
                 }
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 # Fallback parsing if JSON is malformed
+                logger.warning(f"Could not parse classification response: {response['content'][:200]!r}")
+                salvaged = self.salvage_classification(response['content'])
+                if salvaged is not None:
+                    return {
+                        **salvaged,
+                        'all_categories': categories,
+                        'model': self.model_name,
+                        'raw_response': response['content']
+                    }
                 return {
                     'category': 'unknown',
                     'confidence': 0.0,
@@ -168,58 +388,125 @@ class FireworksWrapper(BaseModelWrapper):
             logger.error(f"Error in classification: {str(e)}")
             raise
     
-    async def validate(self, content: str, validation_rules: Dict[str, Any]) -> Dict[str, Any]:
+    async def _classify_many(self, texts: List[str], categories: List[str]) -> List[Dict[str, Any]]:
         """
-        Validate content against specified rules using Fireworks AI.
+        Classify several texts with a single request.
+        
+        Entries are matched to texts by their "index" field, never by
+        position, so a reordered answer cannot swap labels between texts.
+        Texts whose entry is missing, out of range or duplicated are
+        classified again with their own request.
         
         Args:
-            content: Content to validate
-            validation_rules: Rules to validate against
+            texts: Texts to classify
+            categories: List of possible categories
             
         Returns:
-            Validation results
+            Classification results, in input order
         """
-        # Create validation prompt
-        rules_str = "\n".join([f"- {rule}: {desc}" for rule, desc in validation_rules.items()])
-        prompt = f"""
-        Validate the following content against these rules:
+        numbered = "\n".join(f"{i}. {text}" for i, text in enumerate(texts, 1))
+        prompt = f"{_batch_classify_prefix(tuple(categories))}{numbered}{_BATCH_CLASSIFY_SUFFIX}"
+        
+        response = await self._generate(
+            prompt,
+            temperature=0.1,
+            response_format={"type": "json_object"}
+        )
+        
+        try:
+            entries = _extract_json(response['content']).get('results')
+        except (orjson.JSONDecodeError, AttributeError):
+            entries = None
+        if not isinstance(entries, list):
+            entries = []
         
-        {rules_str}
+        matched: Dict[int, Dict[str, Any]] = {}
+        duplicates = set()
+        for entry in entries:
+            index = entry.get('index') if isinstance(entry, dict) else None
+            if type(index) is not int or not 1 <= index <= len(texts):
+                continue
+            if index in matched:
+                duplicates.add(index)
+            matched[index] = entry
+        for index in duplicates:
+            del matched[index]
         
-        Content: {content}
+        results = {
+            index: {
+                'category': entry.get('category'),
+                'confidence': entry.get('confidence', 0.0),
+                'reasoning': entry.get('reasoning', ''),
+                'all_categories': categories,
+                'model': self.model_name
+            }
+            for index, entry in matched.items()
+        }
         
-        Please respond with a JSON object containing:
-        1. "is_valid": boolean indicating if content passes all rules
-        2. "violations": list of rule violations found
-        3. "confidence": confidence score between 0 and 1
-        4. "suggestions": suggestions for improvement
+        unmatched = [index for index in range(1, len(texts) + 1) if index not in results]
+        if unmatched:
+            logger.warning(f"{len(unmatched)} of {len(texts)} batched classifications could not be matched, retrying individually")
+            retried = await asyncio.gather(*(self._classify_one(texts[index - 1], categories) for index in unmatched))
+            results.update(zip(unmatched, retried))
         
-        Response:
+        return [results[index] for index in range(1, len(texts) + 1)]
+    
+    async def validate_with_prompt(self, content: str, rules_prompt: str, rules_checked: List[str]) -> Dict[str, Any]:
         """
+        Validate content against pre-formatted rules using Fireworks AI.
+        
+        Duplicate requests share one call.
+        
+        Args:
+            content: Content to validate
+            rules_prompt: Validation rules formatted for the prompt
+            rules_checked: Names of the rules being checked
+            
+        Returns:
+            Validation results
+        """
+        key = self._request_key('validate', content, rules_prompt)
+        return await self._coalesce(key, lambda: self._validate_one(content, rules_prompt, rules_checked))
+    
+    async def _validate_one(self, content: str, rules_prompt: str, rules_checked: List[str]) -> Dict[str, Any]:
+        """
+        Validate content with its own request.
+        
+        Args:
+            content: Content to validate
+            rules_prompt: Validation rules formatted for the prompt
+            rules_checked: Names of the rules being checked
+            
+        Returns:
+            Validation results
+        """
+        # Create validation prompt
+        prefix = VALIDATE_PROMPT_PREFIX.format(rules=rules_prompt)
+        prompt = f"{prefix} {content}{VALIDATE_PROMPT_SUFFIX}"
         
         try:
-            response = await self.generate(prompt, temperature=0.1)
+            response = await self._generate(prompt, temperature=0.1)
             
             # Parse response
-            import json
             try:
-                result = json.loads(response['content'])
+                result = _extract_json(response['content'])
                 return {
                     'is_valid': result.get('is_valid', False),
                     'violations': result.get('violations', []),
                     'confidence': result.get('confidence', 0.0),
                     'suggestions': result.get('suggestions', []),
                     'model': self.model_name,
-                    'rules_checked': list(validation_rules.keys())
+                    'rules_checked': list(rules_checked)
                 }
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
+                logger.warning(f"Could not parse validation response: {response['content'][:200]!r}")
                 return {
                     'is_valid': False,
                     'violations': ['Failed to parse validation response'],
                     'confidence': 0.0,
                     'suggestions': ['Check model response format'],
                     'model': self.model_name,
-                    'rules_checked': list(validation_rules.keys()),
+                    'rules_checked': list(rules_checked),
                     'raw_response': response['content']
                 }
                 
@@ -229,8 +516,10 @@ class FireworksWrapper(BaseModelWrapper):
     
     async def close(self):
         """
-        Close the aiohttp session.
+        Close the batcher and the aiohttp session.
         """
+        if self._batcher is not None:
+            await self._batcher.close()
         if self.session and not self.session.closed:
             await self.session.close()
     
@@ -5,12 +5,106 @@ This module provides a wrapper for open-source GPT models, implementing the base
 """
 
 import asyncio
-from typing import Dict, Any, List
-from transformers import AutoTokenizer, AutoModelForCausalLM
+import functools
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Literal, Optional, Tuple, Type, Union
+from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig, StoppingCriteria, StoppingCriteriaList
+from pydantic import BaseModel, create_model
 import torch
+import orjson
 from loguru import logger
 
-from .base_wrapper import BaseModelWrapper
+try:
+    import outlines
+except ImportError:  # constrained decoding is optional; free generation is parsed instead
+    outlines = None
+
+from .base_wrapper import (
+    BaseModelWrapper,
+    CLASSIFY_PROMPT_PREFIX,
+    CLASSIFY_PROMPT_SUFFIX,
+    VALIDATE_PROMPT_PREFIX,
+    VALIDATE_PROMPT_SUFFIX,
+    classify_prompt_prefix
+)
+
+# Prompt lengths are padded up to one of these when the model is compiled,
+# so a handful of shapes cover every request
+PROMPT_BUCKETS = (256, 512, 1024, 2048)
+MAX_PROMPT_TOKENS = PROMPT_BUCKETS[-1]
+
+# low_cpu_mem_usage, device_map and bitsandbytes loading all need accelerate;
+# transformers raises ImportError without it, so those options are gated on it
+ACCELERATE_AVAILABLE = importlib.util.find_spec("accelerate") is not None
+
+# Weight quantization modes accepted in the 'quantization' config key
+QUANTIZATION_MODES = ("none", "int8", "nf4")
+
+# Cue for scoring categories from next-token logits instead of generating JSON
+LOGIT_CLASSIFY_SUFFIX = "\n\nAnswer with the category name only.\n\nCategory:"
+LOGIT_VALIDATE_SUFFIX = "\n\nDoes the content pass all of the rules? Answer (yes/no):"
+
+
+class ValidationAnswer(BaseModel):
+    """
+    Schema for constrained validation answers.
+    """
+    is_valid: bool
+    violations: List[str]
+    confidence: float
+    suggestions: List[str]
+
+
+@functools.lru_cache(maxsize=64)
+def _classification_answer(categories: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    Build the schema for constrained classification answers.
+    
+    Args:
+        categories: Possible categories
+        
+    Returns:
+        Model class whose category field only admits the given categories
+    """
+    return create_model(
+        'ClassificationAnswer',
+        category=(Literal[categories], ...),
+        confidence=(float, ...),
+        reasoning=(str, ...)
+    )
+
+
+class JSONObjectEnd(StoppingCriteria):
+    """
+    Stop each row once it emits a token closing a JSON object.
+    
+    Replies are asked for a flat JSON object, so the first closing brace
+    ends the answer; anything generated after it is discarded anyway.
+    """
+    
+    def __init__(self, tokenizer):
+        """
+        Initialize the stopping criteria.
+        
+        Args:
+            tokenizer: Tokenizer used to decode the latest tokens
+        """
+        self.tokenizer = tokenizer
+    
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        """
+        Check the latest token of each row.
+        
+        Args:
+            input_ids: Prompt and generated tokens so far
+            scores: Next-token scores (unused)
+            
+        Returns:
+            Per-row flags, True where the row is finished
+        """
+        last = self.tokenizer.batch_decode(input_ids[:, -1:], skip_special_tokens=True)
+        return torch.tensor([text.rstrip().endswith("}") for text in last], device=input_ids.device)
 
 
 class GPTOSSWrapper(BaseModelWrapper):
@@ -35,9 +129,49 @@ class GPTOSSWrapper(BaseModelWrapper):
         self.model = None
         self.tokenizer = None
         
+        # Requests arriving within max_wait_ms of each other share one
+        # model.generate call; the queue and its task start on first use
+        self.max_batch_size = config.get('max_batch_size', 8)
+        self.max_wait = config.get('max_wait_ms', 5) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        
+        # Set when the model is compiled for static shapes
+        self._bucket_prompts = False
+        
+        # Every model call runs on this one thread, which keeps the event
+        # loop free during forward passes and never runs two at once
+        self._model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gpt-oss-model")
+        
         # Load model and tokenizer
         self._load_model()
         
+        # Token ids of fixed prompt fragments, keyed by fragment text
+        self._fragment_ids = functools.lru_cache(maxsize=128)(self._tokenize_fragment)
+        self._splice_tokens = self._check_splice()
+        
+        # Used by generate_batch for stop_at_json requests
+        self._json_stop = StoppingCriteriaList([JSONObjectEnd(self.tokenizer)])
+        
+        # Explaining a failing logit verdict costs a full generation, so it
+        # is only done when the config opts in
+        self.explain_failures = config.get('explain_failures', False)
+        
+        # First token id of each category, keyed by the category tuple
+        self._category_first_token_ids = functools.lru_cache(maxsize=64)(self._first_token_ids)
+        self._yes_no_ids = self._first_token_ids(("yes", "no"))
+        
+        # Schema-constrained JSON decoding, when enabled and outlines is
+        # installed. Each answer is generated alone in a worker thread,
+        # outside the request batcher, so it is opt-in.
+        self._outlines_model = None
+        if config.get('constrained_decoding', False):
+            if outlines is None:
+                logger.warning("constrained_decoding requires the outlines package, parsing free generation instead")
+            else:
+                self._outlines_model = outlines.models.Transformers(self.model, self.tokenizer)
+        self._json_generator = functools.lru_cache(maxsize=64)(self._build_json_generator)
+        
         logger.info(f"GPT-OSS wrapper initialized with device: {self.device}")
     
     def _load_model(self):
@@ -61,20 +195,60 @@ class GPTOSSWrapper(BaseModelWrapper):
             logger.info(f"Loading model: {model_id}")
             
             # Load tokenizer
-            self.tokenizer = AutoTokenizer.from_pretrained(model_id)
+            self.tokenizer = AutoTokenizer.from_pretrained(model_id, use_fast=True)
+            if not getattr(self.tokenizer, 'is_fast', False):
+                logger.warning(f"No fast tokenizer for {model_id}, encoding and decoding will run in Python")
             if self.tokenizer.pad_token is None:
                 self.tokenizer.pad_token = self.tokenizer.eos_token
+            # Decoder-only models must be left-padded for batched generation
+            self.tokenizer.padding_side = "left"
             
-            # Load model
-            self.model = AutoModelForCausalLM.from_pretrained(
-                model_id,
-                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-                device_map="auto" if self.device == "cuda" else None,
-                trust_remote_code=True
-            )
+            # Prefer bf16 on GPUs that support it (Ampere and newer): same
+            # Tensor Core throughput as fp16 with fp32's dynamic range
+            if self.device == "cuda":
+                dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+                torch.set_float32_matmul_precision("high")
+            else:
+                dtype = torch.float32
             
-            if self.device == "cpu":
-                self.model = self.model.to(self.device)
+            quantization_config = self._quantization_config(dtype)
+            
+            load_kwargs = {}
+            if ACCELERATE_AVAILABLE:
+                # Load weights straight into place instead of after a random init
+                load_kwargs['low_cpu_mem_usage'] = True
+                if self.device == "cuda":
+                    load_kwargs['device_map'] = "auto"
+            else:
+                logger.warning("accelerate is not installed, loading weights without low_cpu_mem_usage")
+            
+            # Load model with the fastest attention backend available:
+            # FlashAttention 2 (CUDA only), then PyTorch SDPA, then the default
+            backends = ["flash_attention_2", "sdpa", None] if self.device == "cuda" else ["sdpa", None]
+            for attn_implementation in backends:
+                try:
+                    self.model = AutoModelForCausalLM.from_pretrained(
+                        model_id,
+                        torch_dtype=dtype,
+                        trust_remote_code=True,
+                        attn_implementation=attn_implementation,
+                        quantization_config=quantization_config,
+                        **load_kwargs
+                    )
+                    break
+                except (ImportError, ValueError) as e:
+                    if attn_implementation is None:
+                        raise
+                    logger.info(f"Attention backend {attn_implementation} unavailable: {str(e)}")
+            
+            logger.info(f"Using {attn_implementation or 'default'} attention")
+            
+            if self.device == "cuda" and 'device_map' not in load_kwargs:
+                self.model.to(self.device)
+            
+            # bitsandbytes kernels don't trace cleanly, so quantized models run eagerly
+            if self.device == "cuda" and self.config.get('compile_model', True) and quantization_config is None:
+                self._compile_model()
             
             logger.info(f"Model {model_id} loaded successfully")
             
@@ -82,94 +256,527 @@ class GPTOSSWrapper(BaseModelWrapper):
             logger.error(f"Error loading model: {str(e)}")
             raise
     
-    async def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
+    def _quantization_config(self, dtype: torch.dtype) -> Optional[BitsAndBytesConfig]:
+        """
+        Build the weight quantization settings from the 'quantization' config key.
+        
+        Args:
+            dtype: Compute dtype for dequantized matmuls
+            
+        Returns:
+            bitsandbytes settings, or None to load unquantized weights
+            
+        Raises:
+            ValueError: If the quantization mode is unknown
+            ImportError: If quantization is requested without accelerate installed
+        """
+        quantization = self.config.get('quantization') or "none"
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization {quantization!r}, expected one of {QUANTIZATION_MODES}")
+        if quantization == "none":
+            return None
+        if self.device != "cuda":
+            logger.warning(f"{quantization} quantization requires CUDA, loading unquantized weights")
+            return None
+        if not ACCELERATE_AVAILABLE:
+            raise ImportError(f"{quantization} quantization requires accelerate: pip install accelerate")
+        
+        logger.info(f"Loading {quantization} quantized weights")
+        if quantization == "int8":
+            return BitsAndBytesConfig(load_in_8bit=True)
+        return BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_compute_dtype=dtype,
+            bnb_4bit_quant_type="nf4",
+            bnb_4bit_use_double_quant=True
+        )
+    
+    def _compile_model(self):
+        """
+        Compile the model for a static KV cache and warm each prompt bucket.
+        
+        A static cache keeps tensor shapes fixed between decode steps, which
+        lets torch.compile capture CUDA graphs instead of dispatching every
+        op from Python. Warming each bucket once at startup moves the
+        compilation cost out of the first requests. Two new tokens cover
+        both the prefill and the decode-step graphs, and a plain forward
+        pass per bucket warms the logit scoring path, which runs without
+        a KV cache.
+        """
+        self.model.generation_config.cache_implementation = "static"
+        self.model.forward = torch.compile(self.model.forward, mode="reduce-overhead", fullgraph=False)
+        self._bucket_prompts = True
+        
+        # CUDA graph trees are thread-local, so warm up on the model thread
+        # that serves every later forward pass
+        self._model_executor.submit(self._warm_up).result()
+    
+    def _warm_up(self):
+        """
+        Run each prompt bucket once through generation and logit scoring.
+        """
+        pad_id = self.tokenizer.pad_token_id
+        for length in PROMPT_BUCKETS:
+            logger.info(f"Warming up compiled model for {length}-token prompts")
+            input_ids = torch.full((1, length), pad_id, dtype=torch.long, device=self.device)
+            inputs = {'input_ids': input_ids, 'attention_mask': torch.ones_like(input_ids)}
+            self._generate_tokens(inputs, max_new_tokens=2, do_sample=False, pad_token_id=pad_id)
+            self._score_next_token(inputs, (pad_id,))
+    
+    async def generate(self, prompt: Union[str, List[int]], **kwargs) -> Dict[str, Any]:
         """
         Generate a response using the local GPT model.
         
+        The prompt is queued and batched with other prompts that arrive
+        within ``max_wait_ms`` and use the same generation parameters.
+        
         Args:
-            prompt: Input prompt
+            prompt: Input prompt, as text or pre-tokenized input ids
             **kwargs: Additional parameters
             
         Returns:
             Generated response with metadata
         """
-        try:
-            # Prepare input
-            inputs = self.tokenizer(prompt, return_tensors="pt", truncation=True, max_length=2048)
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        if self._batch_task is None or self._batch_task.done():
+            self._queue = asyncio.Queue()
+            self._batch_task = asyncio.create_task(self._run_batches())
+        
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((prompt, kwargs, future))
+        return await future
+    
+    async def generate_batch(self, prompts: List[Union[str, List[int]]], **kwargs) -> List[Dict[str, Any]]:
+        """
+        Generate responses for several prompts with a single model call.
+        
+        Args:
+            prompts: Input prompts, as text or pre-tokenized input ids
+            **kwargs: Additional parameters shared by all prompts
             
+        Returns:
+            Generated responses with metadata, in prompt order
+        """
+        try:
             # Get generation parameters
-            max_tokens = kwargs.get('max_tokens', self.max_tokens)
-            temperature = kwargs.get('temperature', self.temperature)
-            
-            # Generate response
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    **inputs,
-                    max_new_tokens=max_tokens,
-                    temperature=temperature,
-                    do_sample=temperature > 0,
-                    pad_token_id=self.tokenizer.eos_token_id,
-                    **kwargs
-                )
+            max_tokens = kwargs.pop('max_tokens', self.max_tokens)
+            temperature = kwargs.pop('temperature', self.temperature)
+            if kwargs.pop('stop_at_json', False):
+                kwargs['stopping_criteria'] = self._json_stop
             
-            # Decode response
-            response_tokens = outputs[0][inputs['input_ids'].shape[1]:]
-            response_text = self.tokenizer.decode(response_tokens, skip_special_tokens=True)
+            # Prepare input off the event loop; tokenizing long prompts takes milliseconds
+            inputs = await asyncio.to_thread(self._encode, prompts)
             
-            # Calculate token usage
-            input_tokens = inputs['input_ids'].shape[1]
-            output_tokens = response_tokens.shape[0]
-            total_tokens = input_tokens + output_tokens
+            # Generate responses on the model thread
+            outputs = await self._run_on_model(
+                self._generate_tokens,
+                inputs,
+                max_new_tokens=max_tokens,
+                temperature=temperature,
+                do_sample=temperature > 0,
+                pad_token_id=self.tokenizer.eos_token_id,
+                **kwargs
+            )
             
-            return {
-                'content': response_text.strip(),
-                'model': self.model_name,
-                'usage': {
-                    'prompt_tokens': input_tokens,
-                    'completion_tokens': output_tokens,
-                    'total_tokens': total_tokens
-                },
-                'finish_reason': 'stop'
-            }
+            # Decode responses, dropping the (left-padded) prompt columns
+            response_tokens = outputs[:, inputs['input_ids'].shape[1]:]
+            response_texts = await asyncio.to_thread(self._decode, response_tokens)
+            
+            # Calculate token usage per row, excluding padding
+            input_tokens = inputs['attention_mask'].sum(dim=1).tolist()
+            output_tokens = (response_tokens != self.tokenizer.pad_token_id).sum(dim=1).tolist()
+            
+            return [
+                {
+                    'content': text.strip(),
+                    'model': self.model_name,
+                    'usage': {
+                        'prompt_tokens': prompt_tokens,
+                        'completion_tokens': completion_tokens,
+                        'total_tokens': prompt_tokens + completion_tokens
+                    },
+                    'finish_reason': 'stop'
+                }
+                for text, prompt_tokens, completion_tokens in zip(response_texts, input_tokens, output_tokens)
+            ]
             
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
             raise
     
-    async def classify(self, text: str, categories: List[str]) -> Dict[str, Any]:
+    async def _run_on_model(self, fn, *args, **kwargs) -> Any:
+        """
+        Run a blocking model call on the dedicated model thread.
+        
+        Args:
+            fn: Function that calls the model
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+            
+        Returns:
+            The function's result
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._model_executor, functools.partial(fn, *args, **kwargs))
+    
+    def _generate_tokens(self, inputs: Dict[str, torch.Tensor], **kwargs) -> torch.Tensor:
+        """
+        Run model.generate on encoded prompts.
+        
+        Args:
+            inputs: Padded input tensors
+            **kwargs: Generation parameters
+            
+        Returns:
+            Prompt and generated tokens, one row per prompt
+        """
+        with torch.inference_mode(), torch.autocast(
+            device_type=self.device, dtype=self.model.dtype, enabled=self.device == "cuda"
+        ):
+            return self.model.generate(**inputs, **kwargs)
+    
+    def _encode(self, prompts: List[Union[str, List[int]]]) -> Dict[str, torch.Tensor]:
+        """
+        Tokenize a batch of prompts onto the model device.
+        
+        Args:
+            prompts: Input prompts, as text or pre-tokenized input ids
+            
+        Returns:
+            Padded input tensors
+        """
+        texts = [prompt for prompt in prompts if isinstance(prompt, str)]
+        if len(texts) == len(prompts) and not self._bucket_prompts:
+            inputs = self.tokenizer(prompts, return_tensors="pt", padding=True, truncation=True, max_length=MAX_PROMPT_TOKENS)
+        else:
+            encoded = iter(self.tokenizer(texts, truncation=True, max_length=MAX_PROMPT_TOKENS)['input_ids'] if texts else ())
+            rows = [next(encoded) if isinstance(prompt, str) else prompt[:MAX_PROMPT_TOKENS] for prompt in prompts]
+            
+            # A compiled model only sees the bucketed lengths it was warmed for
+            padding, max_length = True, None
+            if self._bucket_prompts:
+                longest = max(len(row) for row in rows)
+                padding, max_length = "max_length", next(b for b in PROMPT_BUCKETS if b >= longest)
+            inputs = self.tokenizer.pad({'input_ids': rows}, padding=padding, max_length=max_length, return_tensors="pt")
+        if self.device != "cuda":
+            return {k: v.to(self.device) for k, v in inputs.items()}
+        
+        # Pinned pages let the copy run as async DMA; the host allocator caches them
+        return {k: v.pin_memory().to(self.device, non_blocking=True) for k, v in inputs.items()}
+    
+    def _tokenize_fragment(self, fragment: str) -> List[int]:
+        """
+        Tokenize a fixed prompt fragment without special tokens.
+        
+        Args:
+            fragment: Prompt text
+            
+        Returns:
+            Token ids
+        """
+        return self.tokenizer(fragment, add_special_tokens=False)['input_ids']
+    
+    def _build_prompt(self, prefix: str, text: str, suffix: str) -> Union[str, List[int]]:
+        """
+        Build a prompt from fixed fragments around variable text.
+        
+        When splicing is safe for this tokenizer, only the variable text is
+        tokenized and the fragments' cached token ids are reused.
+        
+        Args:
+            prefix: Fixed text before the variable part
+            text: Variable text
+            suffix: Fixed text after the variable part
+            
+        Returns:
+            Input ids, or the prompt text when splicing is disabled
+        """
+        if not self._splice_tokens:
+            return f"{prefix} {text}{suffix}"
+        
+        ids = self._fragment_ids(prefix) + self._tokenize_fragment(f" {text}") + self._fragment_ids(suffix)
+        return self.tokenizer.build_inputs_with_special_tokens(ids)
+    
+    def _check_splice(self) -> bool:
+        """
+        Check that spliced prompt tokens match whole-prompt tokenization.
+        
+        Returns:
+            True if fragments can be tokenized separately for this tokenizer
+        """
+        prefix = CLASSIFY_PROMPT_PREFIX.format(categories="safe, unsafe")
+        text = "A short sample, to check token boundaries."
+        try:
+            expected = self.tokenizer(f"{prefix} {text}{CLASSIFY_PROMPT_SUFFIX}")['input_ids']
+            spliced = self.tokenizer.build_inputs_with_special_tokens(
+                self._tokenize_fragment(prefix) + self._tokenize_fragment(f" {text}") + self._tokenize_fragment(CLASSIFY_PROMPT_SUFFIX)
+            )
+        except Exception as e:
+            logger.debug(f"Prompt token splicing unavailable: {str(e)}")
+            return False
+        
+        if list(spliced) != list(expected):
+            logger.info("Tokenizer merges across prompt boundaries, tokenizing whole prompts")
+            return False
+        return True
+    
+    def _decode(self, response_tokens: torch.Tensor) -> List[str]:
+        """
+        Decode generated token rows to text.
+        
+        All rows go through one batched call, which a fast tokenizer runs
+        natively. The cleanup pass is skipped; it only rewrites spacing
+        around punctuation, which the JSON answers don't depend on.
+        
+        Args:
+            response_tokens: Generated tokens, one row per prompt
+            
+        Returns:
+            Decoded responses
+        """
+        return self.tokenizer.batch_decode(response_tokens, skip_special_tokens=True, clean_up_tokenization_spaces=False)
+    
+    async def _run_batches(self) -> None:
+        """
+        Drain queued prompts into batches and run them through the model.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Prompts can only share a generate call when their parameters match
+            try:
+                groups: Dict[Tuple, Tuple[Dict[str, Any], List[Tuple[str, asyncio.Future]]]] = {}
+                for prompt, kwargs, future in batch:
+                    groups.setdefault(self._group_key(kwargs), (kwargs, []))[1].append((prompt, future))
+            except Exception as e:
+                # Never let a bad request end the loop and strand every caller
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for kwargs, items in groups.values():
+                try:
+                    results = await self.generate_batch([prompt for prompt, _ in items], **kwargs)
+                except Exception as e:
+                    for _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                
+                for (_, future), result in zip(items, results):
+                    if not future.done():
+                        future.set_result(result)
+    
+    @staticmethod
+    def _group_key(kwargs: Dict[str, Any]) -> Tuple:
+        """
+        Build the key under which requests with matching parameters are batched.
+        
+        Args:
+            kwargs: Generation parameters of a request
+            
+        Returns:
+            Hashable key; unhashable values, such as a stopping_criteria
+            list, only match the same object
+        """
+        key = []
+        for name, value in sorted(kwargs.items()):
+            try:
+                hash(value)
+            except TypeError:
+                value = ('id', id(value))
+            key.append((name, value))
+        return tuple(key)
+    
+    async def close(self):
+        """
+        Stop the background batching task.
+        """
+        if self._batch_task is not None and not self._batch_task.done():
+            self._batch_task.cancel()
+            try:
+                await self._batch_task
+            except asyncio.CancelledError:
+                pass
+        self._batch_task = None
+    
+    async def classify(self, text: str, categories: List[str], reasoning: bool = False) -> Dict[str, Any]:
         """
         Classify text into predefined categories using the local GPT model.
         
+        By default the categories are scored from a single forward pass; the
+        generative JSON path is only used when reasoning is requested.
+        Repeated requests are answered from the response cache.
+        
         Args:
             text: Text to classify
             categories: List of possible categories
+            reasoning: Generate a JSON answer with the model's reasoning
             
         Returns:
             Classification results
         """
-        # Create classification prompt
-        categories_str = ", ".join(categories)
-        prompt = f"""
-        Classify the following text into one of these categories: {categories_str}
+        if reasoning:
+            key = self._request_key('classify', text, *categories)
+            return await self._coalesce(key, lambda: self._classify_one(text, categories))
         
-        Text: {text}
+        key = self._request_key('classify_logits', text, *categories)
+        return await self._coalesce(key, lambda: self._classify_logits(text, categories))
+    
+    async def _classify_logits(self, text: str, categories: List[str]) -> Dict[str, Any]:
+        """
+        Classify text by comparing next-token logits of the category names.
         
-        Please respond with a JSON object containing:
-        1. "category": the most appropriate category
-        2. "confidence": confidence score between 0 and 1
-        3. "reasoning": brief explanation for the classification
+        Args:
+            text: Text to classify
+            categories: List of possible categories
+            
+        Returns:
+            Classification results
+        """
+        token_ids = self._category_first_token_ids(tuple(categories))
+        if token_ids is None:
+            # Categories sharing a first token can't be told apart from one step
+            return await self._classify_one(text, categories)
+        
+        prefix = classify_prompt_prefix(tuple(categories))
+        prompt = self._build_prompt(prefix, text, LOGIT_CLASSIFY_SUFFIX)
+        
+        try:
+            inputs = await asyncio.to_thread(self._encode, [prompt])
+            probs = await self._run_on_model(self._score_next_token, inputs, token_ids)
+            
+            best = int(probs.argmax())
+            return {
+                'category': categories[best],
+                'confidence': float(probs[best]),
+                'reasoning': '',
+                'scores': dict(zip(categories, probs.tolist())),
+                'all_categories': categories,
+                'model': self.model_name
+            }
+            
+        except Exception as e:
+            # Raised rather than returned so the failure is not cached
+            logger.error(f"Error in classification: {str(e)}")
+            raise
+    
+    def _score_next_token(self, inputs: Dict[str, torch.Tensor], token_ids: Tuple[int, ...]) -> torch.Tensor:
+        """
+        Run one forward pass and score candidate next tokens.
+        
+        Runs on the model thread, like every other model call, so it never
+        overlaps generation and the event loop keeps serving requests.
+        
+        Args:
+            inputs: Encoded prompt, a single row
+            token_ids: Candidate token ids
+            
+        Returns:
+            Probabilities of the candidates, normalized over the candidates
+        """
+        with torch.inference_mode(), torch.autocast(
+            device_type=self.device, dtype=self.model.dtype, enabled=self.device == "cuda"
+        ):
+            logits = self.model(**inputs).logits[:, -1]
+            candidates = logits[0, list(token_ids)].float()
+        return torch.softmax(candidates, dim=-1).cpu()
+    
+    def _first_token_ids(self, categories: Tuple[str, ...]) -> Optional[Tuple[int, ...]]:
+        """
+        Look up the first token id of each category as it follows the cue.
         
-        Response:
+        Args:
+            categories: Category names
+            
+        Returns:
+            One token id per category, or None if two categories share one
+        """
+        token_ids = tuple(self._tokenize_fragment(f" {category}")[0] for category in categories)
+        if len(set(token_ids)) != len(token_ids):
+            logger.debug(f"Answers share first tokens, using generation instead: {categories}")
+            return None
+        return token_ids
+    
+    def _build_json_generator(self, schema: Type[BaseModel]) -> Any:
         """
+        Build an outlines generator constrained to a JSON schema.
+        
+        Compiling the schema into a token automaton is slow, so generators
+        are cached per schema.
+        
+        Args:
+            schema: Pydantic model describing the answer
+            
+        Returns:
+            Generator returning schema instances
+        """
+        return outlines.generate.json(self._outlines_model, schema)
+    
+    def _generate_structured(self, prompt: str, schema: Type[BaseModel]) -> BaseModel:
+        """
+        Generate an answer that is guaranteed to match a JSON schema.
+        
+        Blocks for the whole generation, so callers run it on the model thread.
+        
+        Args:
+            prompt: Input prompt
+            schema: Pydantic model describing the answer
+            
+        Returns:
+            Parsed answer
+        """
+        with torch.inference_mode():
+            return self._json_generator(schema)(prompt, max_tokens=self.max_tokens)
+    
+    async def _classify_one(self, text: str, categories: List[str]) -> Dict[str, Any]:
+        """
+        Classify text with a model call.
+        
+        Args:
+            text: Text to classify
+            categories: List of possible categories
+            
+        Returns:
+            Classification results
+        """
+        # Create classification prompt
+        prefix = classify_prompt_prefix(tuple(categories))
         
         try:
-            response = await self.generate(prompt, temperature=0.1)
+            if self._outlines_model is not None:
+                # Decoding is constrained to the schema, so the answer always parses
+                answer = await self._run_on_model(
+                    self._generate_structured,
+                    f"{prefix} {text}{CLASSIFY_PROMPT_SUFFIX}",
+                    _classification_answer(tuple(categories))
+                )
+                return {
+                    'category': answer.category,
+                    'confidence': answer.confidence,
+                    'reasoning': answer.reasoning,
+                    'all_categories': categories,
+                    'model': self.model_name
+                }
+            
+            prompt = self._build_prompt(prefix, text, CLASSIFY_PROMPT_SUFFIX)
+            
+            # Stop decoding at the end of the JSON answer rather than at max_tokens
+            response = await self._generate(prompt, temperature=0.1, stop_at_json=True)
             
             # Parse response (assuming JSON format)
-            import json
             try:
-                result = json.loads(response['content'])
+                result = self.parse_json_content(response['content'])
                 return {
                     'category': result.get('category'),
                     'confidence': result.get('confidence', 0.0),
@@ -177,8 +784,16 @@ class GPTOSSWrapper(BaseModelWrapper):
                     'all_categories': categories,
                     'model': self.model_name
                 }
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 # Fallback parsing if JSON is malformed
+                salvaged = self.salvage_classification(response['content'])
+                if salvaged is not None:
+                    return {
+                        **salvaged,
+                        'all_categories': categories,
+                        'model': self.model_name,
+                        'raw_response': response['content']
+                    }
                 return {
                     'category': 'unknown',
                     'confidence': 0.0,
@@ -192,58 +807,126 @@ class GPTOSSWrapper(BaseModelWrapper):
             logger.error(f"Error in classification: {str(e)}")
             raise
     
-    async def validate(self, content: str, validation_rules: Dict[str, Any]) -> Dict[str, Any]:
+    async def validate_with_prompt(
+        self, content: str, rules_prompt: str, rules_checked: List[str], explain: bool = False
+    ) -> Dict[str, Any]:
         """
-        Validate content against specified rules using the local GPT model.
+        Validate content against pre-formatted rules using the local GPT model.
+        
+        By default the verdict is read from the yes/no logits of a single
+        forward pass, with no violations or suggestions. Failing content
+        gets them from the generative JSON path when explain_failures is
+        enabled in the config. With explain, the generative path decides
+        the verdict as well.
+        Repeated requests are answered from the response cache.
         
         Args:
             content: Content to validate
-            validation_rules: Rules to validate against
+            rules_prompt: Validation rules formatted for the prompt
+            rules_checked: Names of the rules being checked
+            explain: Generate a JSON answer with violations and suggestions
             
         Returns:
             Validation results
         """
-        # Create validation prompt
-        rules_str = "\n".join([f"- {rule}: {desc}" for rule, desc in validation_rules.items()])
-        prompt = f"""
-        Validate the following content against these rules:
+        if explain or self._yes_no_ids is None:
+            key = self._request_key('validate', content, rules_prompt)
+            return await self._coalesce(key, lambda: self._validate_one(content, rules_prompt, rules_checked))
+        
+        key = self._request_key('validate_logits', content, rules_prompt)
+        return await self._coalesce(key, lambda: self._validate_logits(content, rules_prompt, rules_checked))
+    
+    async def _validate_logits(self, content: str, rules_prompt: str, rules_checked: List[str]) -> Dict[str, Any]:
+        """
+        Validate content by comparing the next-token logits of yes and no.
+        
+        A failing verdict is kept, and the violations and suggestions are
+        filled in from a generated explanation when explain_failures is on.
+        
+        Args:
+            content: Content to validate
+            rules_prompt: Validation rules formatted for the prompt
+            rules_checked: Names of the rules being checked
+            
+        Returns:
+            Validation results
+        """
+        prefix = VALIDATE_PROMPT_PREFIX.format(rules=rules_prompt)
+        prompt = self._build_prompt(prefix, content, LOGIT_VALIDATE_SUFFIX)
         
-        {rules_str}
+        try:
+            inputs = await asyncio.to_thread(self._encode, [prompt])
+            p_yes = float((await self._run_on_model(self._score_next_token, inputs, self._yes_no_ids))[0])
+            result = {
+                'is_valid': p_yes > 0.5,
+                'violations': [],
+                'confidence': max(p_yes, 1.0 - p_yes),
+                'suggestions': [],
+                'model': self.model_name,
+                'rules_checked': list(rules_checked)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in validation: {str(e)}")
+            raise
         
-        Content: {content}
+        if not result['is_valid'] and self.explain_failures:
+            try:
+                explanation = await self._validate_one(content, rules_prompt, rules_checked)
+            except Exception as e:
+                # The verdict stands without its explanation
+                logger.warning(f"Could not explain failed validation: {str(e)}")
+            else:
+                if 'raw_response' not in explanation:
+                    result['violations'] = explanation.get('violations', [])
+                    result['suggestions'] = explanation.get('suggestions', [])
         
-        Please respond with a JSON object containing:
-        1. "is_valid": boolean indicating if content passes all rules
-        2. "violations": list of rule violations found
-        3. "confidence": confidence score between 0 and 1
-        4. "suggestions": suggestions for improvement
+        return result
+    
+    async def _validate_one(self, content: str, rules_prompt: str, rules_checked: List[str]) -> Dict[str, Any]:
+        """
+        Validate content with a model call.
         
-        Response:
+        Args:
+            content: Content to validate
+            rules_prompt: Validation rules formatted for the prompt
+            rules_checked: Names of the rules being checked
+            
+        Returns:
+            Validation results
         """
+        # Create validation prompt
+        prefix = VALIDATE_PROMPT_PREFIX.format(rules=rules_prompt)
         
         try:
-            response = await self.generate(prompt, temperature=0.1)
+            if self._outlines_model is not None:
+                answer = await self._run_on_model(
+                    self._generate_structured, f"{prefix} {content}{VALIDATE_PROMPT_SUFFIX}", ValidationAnswer
+                )
+                return {**answer.model_dump(), 'model': self.model_name, 'rules_checked': list(rules_checked)}
+            
+            prompt = self._build_prompt(prefix, content, VALIDATE_PROMPT_SUFFIX)
+            response = await self._generate(prompt, temperature=0.1)
             
             # Parse response
-            import json
             try:
-                result = json.loads(response['content'])
+                result = self.parse_json_content(response['content'])
                 return {
                     'is_valid': result.get('is_valid', False),
                     'violations': result.get('violations', []),
                     'confidence': result.get('confidence', 0.0),
                     'suggestions': result.get('suggestions', []),
                     'model': self.model_name,
-                    'rules_checked': list(validation_rules.keys())
+                    'rules_checked': list(rules_checked)
                 }
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 return {
                     'is_valid': False,
                     'violations': ['Failed to parse validation response'],
                     'confidence': 0.0,
                     'suggestions': ['Check model response format'],
                     'model': self.model_name,
-                    'rules_checked': list(validation_rules.keys()),
+                    'rules_checked': list(rules_checked),
                     'raw_response': response['content']
                 }
                 
@@ -5,12 +5,24 @@ This module provides a wrapper for Llama models, implementing the base wrapper i
 """
 
 import asyncio
+import importlib.util
 from typing import Dict, Any, List
 from transformers import AutoTokenizer, AutoModelForCausalLM
 import torch
+import orjson
 from loguru import logger
 
-from .base_wrapper import BaseModelWrapper
+from .base_wrapper import (
+    BaseModelWrapper,
+    CLASSIFY_PROMPT_SUFFIX,
+    VALIDATE_PROMPT_PREFIX,
+    VALIDATE_PROMPT_SUFFIX,
+    classify_prompt_prefix
+)
+
+# low_cpu_mem_usage and device_map need accelerate; transformers raises
+# ImportError without it, so both are only passed when it is installed
+ACCELERATE_AVAILABLE = importlib.util.find_spec("accelerate") is not None
 
 
 class LlamaWrapper(BaseModelWrapper):
@@ -63,16 +75,23 @@ class LlamaWrapper(BaseModelWrapper):
             if self.tokenizer.pad_token is None:
                 self.tokenizer.pad_token = self.tokenizer.eos_token
             
+            load_kwargs = {}
+            if ACCELERATE_AVAILABLE:
+                load_kwargs['low_cpu_mem_usage'] = True
+                if self.device == "cuda":
+                    load_kwargs['device_map'] = "auto"
+            else:
+                logger.warning("accelerate is not installed, loading weights without low_cpu_mem_usage")
+            
             # Load model
             self.model = AutoModelForCausalLM.from_pretrained(
                 model_id,
                 torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-                device_map="auto" if self.device == "cuda" else None,
-                trust_remote_code=True
+                trust_remote_code=True,
+                **load_kwargs
             )
-            
-            if self.device == "cpu":
-                self.model = self.model.to(self.device)
+            if self.device == "cuda" and 'device_map' not in load_kwargs:
+                self.model.to(self.device)
             
             logger.info(f"Llama model {model_id} loaded successfully")
             
@@ -164,6 +183,8 @@ class LlamaWrapper(BaseModelWrapper):
         """
         Classify text into predefined categories using the Llama model.
         
+        Repeated requests are answered from the response cache.
+        
         Args:
             text: Text to classify
             categories: List of possible categories
@@ -171,28 +192,30 @@ class LlamaWrapper(BaseModelWrapper):
         Returns:
             Classification results
         """
-        # Create classification prompt
-        categories_str = ", ".join(categories)
-        prompt = f"""
-        Classify the following text into one of these categories: {categories_str}
-        
-        Text: {text}
-        
-        Please respond with a JSON object containing:
-        1. "category": the most appropriate category
-        2. "confidence": confidence score between 0 and 1
-        3. "reasoning": brief explanation for the classification
+        key = self._request_key('classify', text, *categories)
+        return await self._coalesce(key, lambda: self._classify_one(text, categories))
+    
+    async def _classify_one(self, text: str, categories: List[str]) -> Dict[str, Any]:
+        """
+        Classify text with a model call.
         
-        Response:
+        Args:
+            text: Text to classify
+            categories: List of possible categories
+            
+        Returns:
+            Classification results
         """
+        # Create classification prompt
+        prefix = classify_prompt_prefix(tuple(categories))
+        prompt = f"{prefix} {text}{CLASSIFY_PROMPT_SUFFIX}"
         
         try:
-            response = await self.generate(prompt, temperature=0.1)
+            response = await self._generate(prompt, temperature=0.1)
             
             # Parse response (assuming JSON format)
-            import json
             try:
-                result = json.loads(response['content'])
+                result = self.parse_json_content(response['content'])
                 return {
                     'category': result.get('category'),
                     'confidence': result.get('confidence', 0.0),
@@ -200,8 +223,16 @@ class LlamaWrapper(BaseModelWrapper):
                     'all_categories': categories,
                     'model': self.model_name
                 }
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 # Fallback parsing if JSON is malformed
+                salvaged = self.salvage_classification(response['content'])
+                if salvaged is not None:
+                    return {
+                        **salvaged,
+                        'all_categories': categories,
+                        'model': self.model_name,
+                        'raw_response': response['content']
+                    }
                 return {
                     'category': 'unknown',
                     'confidence': 0.0,
@@ -215,58 +246,61 @@ class LlamaWrapper(BaseModelWrapper):
             logger.error(f"Error in classification with Llama: {str(e)}")
             raise
     
-    async def validate(self, content: str, validation_rules: Dict[str, Any]) -> Dict[str, Any]:
+    async def validate_with_prompt(self, content: str, rules_prompt: str, rules_checked: List[str]) -> Dict[str, Any]:
         """
-        Validate content against specified rules using the Llama model.
+        Validate content against pre-formatted rules using the Llama model.
+        
+        Repeated requests are answered from the response cache.
         
         Args:
             content: Content to validate
-            validation_rules: Rules to validate against
+            rules_prompt: Validation rules formatted for the prompt
+            rules_checked: Names of the rules being checked
             
         Returns:
             Validation results
         """
-        # Create validation prompt
-        rules_str = "\n".join([f"- {rule}: {desc}" for rule, desc in validation_rules.items()])
-        prompt = f"""
-        Validate the following content against these rules:
-        
-        {rules_str}
-        
-        Content: {content}
-        
-        Please respond with a JSON object containing:
-        1. "is_valid": boolean indicating if content passes all rules
-        2. "violations": list of rule violations found
-        3. "confidence": confidence score between 0 and 1
-        4. "suggestions": suggestions for improvement
+        key = self._request_key('validate', content, rules_prompt)
+        return await self._coalesce(key, lambda: self._validate_one(content, rules_prompt, rules_checked))
+    
+    async def _validate_one(self, content: str, rules_prompt: str, rules_checked: List[str]) -> Dict[str, Any]:
+        """
+        Validate content with a model call.
         
-        Response:
+        Args:
+            content: Content to validate
+            rules_prompt: Validation rules formatted for the prompt
+            rules_checked: Names of the rules being checked
+            
+        Returns:
+            Validation results
         """
+        # Create validation prompt
+        prefix = VALIDATE_PROMPT_PREFIX.format(rules=rules_prompt)
+        prompt = f"{prefix} {content}{VALIDATE_PROMPT_SUFFIX}"
         
         try:
-            response = await self.generate(prompt, temperature=0.1)
+            response = await self._generate(prompt, temperature=0.1)
             
             # Parse response
-            import json
             try:
-                result = json.loads(response['content'])
+                result = self.parse_json_content(response['content'])
                 return {
                     'is_valid': result.get('is_valid', False),
                     'violations': result.get('violations', []),
                     'confidence': result.get('confidence', 0.0),
                     'suggestions': result.get('suggestions', []),
                     'model': self.model_name,
-                    'rules_checked': list(validation_rules.keys())
+                    'rules_checked': list(rules_checked)
                 }
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 return {
                     'is_valid': False,
                     'violations': ['Failed to parse validation response'],
                     'confidence': 0.0,
                     'suggestions': ['Check model response format'],
                     'model': self.model_name,
-                    'rules_checked': list(validation_rules.keys()),
+                    'rules_checked': list(rules_checked),
                     'raw_response': response['content']
                 }
                 
@@ -5,12 +5,91 @@ This module provides a wrapper for OpenAI's API, implementing the base wrapper i
 """
 
 import asyncio
-from typing import Dict, Any, List
-from openai import AsyncOpenAI
+import functools
+import importlib.util
+import textwrap
+from typing import Dict, Any, List, Optional, Tuple
+from openai import APITimeoutError, AsyncOpenAI, DefaultAsyncHttpxClient
+import orjson
 from loguru import logger
 
 from .base_wrapper import BaseModelWrapper
 
+# Instructions are sent as a fixed system message ahead of the per-call
+# data, so every request shares the same prefix and OpenAI's prompt cache
+# can reuse it. Keep these free of anything that varies between calls.
+_CLASSIFY_SYSTEM_PROMPT = textwrap.dedent("""\
+    You are a content classifier. Classify the text in the user message into
+    exactly one of the categories listed with it.
+    
+    Please respond with a JSON object containing:
+    1. "category": the most appropriate category
+    2. "confidence": confidence score between 0 and 1
+    3. "reasoning": brief explanation for the classification""")
+_VALIDATE_SYSTEM_PROMPT = textwrap.dedent("""\
+    You are a content validator. Validate the content in the user message
+    against the rules listed with it.
+    
+    Please respond with a JSON object containing:
+    1. "is_valid": boolean indicating if content passes all rules
+    2. "violations": list of rule violations found
+    3. "confidence": confidence score between 0 and 1
+    4. "suggestions": suggestions for improvement""")
+
+
+@functools.lru_cache(maxsize=64)
+def _classify_user_prefix(categories: Tuple[str, ...]) -> str:
+    """
+    Build the start of a classification user message for a set of categories.
+    
+    Args:
+        categories: Possible categories, in prompt order
+        
+    Returns:
+        Message text up to the text being classified
+    """
+    return f"Categories: {', '.join(categories)}\nText: "
+
+
+class _JSONObjectScanner:
+    """
+    Tracks brace depth over streamed text to spot the end of the first
+    top-level JSON object without re-parsing the buffer on every chunk.
+    """
+    
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+    
+    def feed(self, text: str) -> int:
+        """
+        Scan the next piece of streamed text.
+        
+        Args:
+            text: Newly received text
+            
+        Returns:
+            Index just past the object's closing brace in ``text``, or -1
+        """
+        for index, char in enumerate(text):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = self.depth > 0
+            elif char == '{':
+                self.depth += 1
+            elif char == '}' and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    return index + 1
+        return -1
+
 
 class OpenAIWrapper(BaseModelWrapper):
     """
@@ -34,7 +113,21 @@ class OpenAIWrapper(BaseModelWrapper):
         if not api_key:
             raise ValueError("OpenAI API key is required")
         
-        self.client = AsyncOpenAI(api_key=api_key)
+        # The SDK enforces the timeout at the HTTP layer, so a stalled request
+        # fails cleanly without tearing down pooled connections. Its own
+        # retries are off; _generate already retries transient failures.
+        # With HTTP/2 (when ``h2`` is installed) concurrent requests multiplex
+        # over a single pooled connection
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            http_client=DefaultAsyncHttpxClient(http2=importlib.util.find_spec("h2") is not None),
+            timeout=self.timeout,
+            max_retries=0
+        )
+        
+        # JSON mode guarantees parseable replies, but older models such as
+        # gpt-4 reject it, so it is only used when the config opts in
+        self.json_mode = config.get('json_mode', False)
         logger.info("OpenAI wrapper initialized successfully")
     
     async def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
@@ -43,29 +136,26 @@ class OpenAIWrapper(BaseModelWrapper):
         
         Args:
             prompt: Input prompt
-            **kwargs: Additional parameters
+            **kwargs: Additional parameters; ``system`` adds a system message
             
         Returns:
             Generated response with metadata
         """
         try:
             # Prepare messages
-            messages = [{"role": "user", "content": prompt}]
+            messages = self._messages(prompt, kwargs.pop('system', None))
             
             # Get parameters
-            max_tokens = kwargs.get('max_tokens', self.max_tokens)
-            temperature = kwargs.get('temperature', self.temperature)
+            max_tokens = kwargs.pop('max_tokens', self.max_tokens)
+            temperature = kwargs.pop('temperature', self.temperature)
             
             # Make API call
-            response = await asyncio.wait_for(
-                self.client.chat.completions.create(
-                    model=self.model_name,
-                    messages=messages,
-                    max_tokens=max_tokens,
-                    temperature=temperature,
-                    **kwargs
-                ),
-                timeout=self.timeout
+            response = await self.client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **kwargs
             )
             
             # Extract response
@@ -83,17 +173,123 @@ class OpenAIWrapper(BaseModelWrapper):
                 'finish_reason': response.choices[0].finish_reason
             }
             
-        except asyncio.TimeoutError:
+        except APITimeoutError:
             logger.error(f"OpenAI API request timed out after {self.timeout} seconds")
             raise
         except Exception as e:
             logger.error(f"Error calling OpenAI API: {str(e)}")
             raise
     
+    async def generate_json_object(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """
+        Stream a response and stop as soon as its first JSON object is complete.
+        
+        Closing the stream early ends generation server-side, so trailing
+        commentary after the object is neither waited for nor billed.
+        The client timeout only bounds each read from the stream, so the
+        whole response is also bounded by the wrapper timeout.
+        
+        Args:
+            prompt: Input prompt
+            **kwargs: Additional parameters; ``system`` adds a system message
+            
+        Returns:
+            Generated response with metadata; token usage is not reported
+            for streamed responses
+        """
+        try:
+            return await asyncio.wait_for(self._stream_json_object(prompt, **kwargs), timeout=self.timeout)
+        except (APITimeoutError, asyncio.TimeoutError):
+            logger.error(f"OpenAI API request timed out after {self.timeout} seconds")
+            raise
+        except Exception as e:
+            logger.error(f"Error calling OpenAI API: {str(e)}")
+            raise
+    
+    async def _stream_json_object(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """
+        Accumulate streamed content up to the end of the first JSON object.
+        
+        Args:
+            prompt: Input prompt
+            **kwargs: Additional parameters
+            
+        Returns:
+            Generated response with metadata
+        """
+        stream = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=self._messages(prompt, kwargs.pop('system', None)),
+            max_tokens=kwargs.pop('max_tokens', self.max_tokens),
+            temperature=kwargs.pop('temperature', self.temperature),
+            stream=True,
+            **kwargs
+        )
+        
+        scanner = _JSONObjectScanner()
+        parts = []
+        finish_reason = None
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                finish_reason = choice.finish_reason or finish_reason
+                delta = choice.delta.content or ''
+                end = scanner.feed(delta)
+                if end >= 0:
+                    parts.append(delta[:end])
+                    finish_reason = finish_reason or 'stop'
+                    break
+                parts.append(delta)
+        finally:
+            await stream.close()
+        
+        return {
+            'content': ''.join(parts),
+            'model': self.model_name,
+            'usage': {},
+            'finish_reason': finish_reason
+        }
+    
+    @staticmethod
+    def _messages(prompt: str, system: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Build the chat messages for a prompt.
+        
+        Args:
+            prompt: User message
+            system: Optional system message placed first
+            
+        Returns:
+            Chat messages
+        """
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+        return messages
+    
+    def _json_kwargs(self, system: str) -> Dict[str, Any]:
+        """
+        Build request parameters for a JSON answer under fixed instructions.
+        
+        Args:
+            system: System message with the instructions
+            
+        Returns:
+            Parameters for generate or generate_json_object
+        """
+        kwargs = {'temperature': 0.1, 'system': system}
+        if self.json_mode:
+            kwargs['response_format'] = {"type": "json_object"}
+        return kwargs
+    
     async def classify(self, text: str, categories: List[str]) -> Dict[str, Any]:
         """
         Classify text into predefined categories using OpenAI.
         
+        Repeated requests are answered from the response cache.
+        
         Args:
             text: Text to classify
             categories: List of possible categories
@@ -101,28 +297,29 @@ class OpenAIWrapper(BaseModelWrapper):
         Returns:
             Classification results
         """
-        # Create classification prompt
-        categories_str = ", ".join(categories)
-        prompt = f"""
-        Classify the following text into one of these categories: {categories_str}
-        
-        Text: {text}
-        
-        Please respond with a JSON object containing:
-        1. "category": the most appropriate category
-        2. "confidence": confidence score between 0 and 1
-        3. "reasoning": brief explanation for the classification
+        key = self._request_key('classify', text, *categories)
+        return await self._coalesce(key, lambda: self._classify_one(text, categories))
+    
+    async def _classify_one(self, text: str, categories: List[str]) -> Dict[str, Any]:
+        """
+        Classify text with a model call.
         
-        Response:
+        Args:
+            text: Text to classify
+            categories: List of possible categories
+            
+        Returns:
+            Classification results
         """
+        # Instructions go in the cached system message, data in the user message
+        prompt = f"{_classify_user_prefix(tuple(categories))}{text}"
         
         try:
-            response = await self.generate(prompt, temperature=0.1)
+            response = await self._generate(prompt, self.generate_json_object, **self._json_kwargs(_CLASSIFY_SYSTEM_PROMPT))
             
             # Parse response (assuming JSON format)
-            import json
             try:
-                result = json.loads(response['content'])
+                result = self.parse_json_content(response['content'])
                 return {
                     'category': result.get('category'),
                     'confidence': result.get('confidence', 0.0),
@@ -130,8 +327,16 @@ class OpenAIWrapper(BaseModelWrapper):
                     'all_categories': categories,
                     'model': self.model_name
                 }
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 # Fallback parsing if JSON is malformed
+                salvaged = self.salvage_classification(response['content'])
+                if salvaged is not None:
+                    return {
+                        **salvaged,
+                        'all_categories': categories,
+                        'model': self.model_name,
+                        'raw_response': response['content']
+                    }
                 return {
                     'category': 'unknown',
                     'confidence': 0.0,
@@ -145,58 +350,60 @@ class OpenAIWrapper(BaseModelWrapper):
             logger.error(f"Error in classification: {str(e)}")
             raise
     
-    async def validate(self, content: str, validation_rules: Dict[str, Any]) -> Dict[str, Any]:
+    async def validate_with_prompt(self, content: str, rules_prompt: str, rules_checked: List[str]) -> Dict[str, Any]:
         """
-        Validate content against specified rules using OpenAI.
+        Validate content against pre-formatted rules using OpenAI.
+        
+        Repeated requests are answered from the response cache.
         
         Args:
             content: Content to validate
-            validation_rules: Rules to validate against
+            rules_prompt: Validation rules formatted for the prompt
+            rules_checked: Names of the rules being checked
             
         Returns:
             Validation results
         """
-        # Create validation prompt
-        rules_str = "\n".join([f"- {rule}: {desc}" for rule, desc in validation_rules.items()])
-        prompt = f"""
-        Validate the following content against these rules:
-        
-        {rules_str}
-        
-        Content: {content}
-        
-        Please respond with a JSON object containing:
-        1. "is_valid": boolean indicating if content passes all rules
-        2. "violations": list of rule violations found
-        3. "confidence": confidence score between 0 and 1
-        4. "suggestions": suggestions for improvement
+        key = self._request_key('validate', content, rules_prompt)
+        return await self._coalesce(key, lambda: self._validate_one(content, rules_prompt, rules_checked))
+    
+    async def _validate_one(self, content: str, rules_prompt: str, rules_checked: List[str]) -> Dict[str, Any]:
+        """
+        Validate content with a model call.
         
-        Response:
+        Args:
+            content: Content to validate
+            rules_prompt: Validation rules formatted for the prompt
+            rules_checked: Names of the rules being checked
+            
+        Returns:
+            Validation results
         """
+        # Rules come before the content so they stay in the shared prefix
+        prompt = f"Rules:\n{rules_prompt}\n\nContent: {content}"
         
         try:
-            response = await self.generate(prompt, temperature=0.1)
+            response = await self._generate(prompt, **self._json_kwargs(_VALIDATE_SYSTEM_PROMPT))
             
             # Parse response
-            import json
             try:
-                result = json.loads(response['content'])
+                result = self.parse_json_content(response['content'])
                 return {
                     'is_valid': result.get('is_valid', False),
                     'violations': result.get('violations', []),
                     'confidence': result.get('confidence', 0.0),
                     'suggestions': result.get('suggestions', []),
                     'model': self.model_name,
-                    'rules_checked': list(validation_rules.keys())
+                    'rules_checked': list(rules_checked)
                 }
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 return {
                     'is_valid': False,
                     'violations': ['Failed to parse validation response'],
                     'confidence': 0.0,
                     'suggestions': ['Check model response format'],
                     'model': self.model_name,
-                    'rules_checked': list(validation_rules.keys()),
+                    'rules_checked': list(rules_checked),
                     'raw_response': response['content']
                 }
                 
@@ -204,6 +411,12 @@ class OpenAIWrapper(BaseModelWrapper):
             logger.error(f"Error in validation: {str(e)}")
             raise
     
+    async def close(self):
+        """
+        Close the OpenAI client and its pooled connections.
+        """
+        await self.client.close()
+    
     def health_check(self) -> Dict[str, Any]:
         """
         Perform health check on OpenAI wrapper.
@@ -0,0 +1,33 @@
+"""
+Shared pytest configuration for the test suite.
+
+Async tests share one session-wide event loop (see pytest.ini) and run on
+uvloop when it is installed.
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio.plugin
+
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
+
+
+if hasattr(pytest_asyncio.plugin, "PytestAsyncioSpecs"):
+    # pytest-asyncio 1.4+ picks loops through this hook and deprecates
+    # overriding event_loop_policy
+    if uvloop is not None:
+        @pytest.hookimpl(optionalhook=True)
+        def pytest_asyncio_loop_factories(config, item):
+            """Run async tests on uvloop."""
+            return {"uvloop": uvloop.new_event_loop}
+else:
+    @pytest.fixture(scope="session")
+    def event_loop_policy():
+        """Run async tests on uvloop when it is installed."""
+        if uvloop is None:
+            return asyncio.DefaultEventLoopPolicy()
+        return uvloop.EventLoopPolicy()
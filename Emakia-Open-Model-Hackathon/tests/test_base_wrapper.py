@@ -0,0 +1,138 @@
+"""
+Unit tests for the base wrapper's request coalescing and result cache.
+"""
+
+import pytest
+import asyncio
+from unittest.mock import patch
+
+from src.wrappers import BaseModelWrapper
+
+
+class CacheStubWrapper(BaseModelWrapper):
+    """Model wrapper that only exercises _coalesce."""
+    
+    def __init__(self, **config):
+        super().__init__(config)
+    
+    async def generate(self, prompt, **kwargs):
+        raise NotImplementedError
+    
+    async def classify(self, text, categories):
+        raise NotImplementedError
+    
+    async def validate_with_prompt(self, content, rules_prompt, rules_checked):
+        raise NotImplementedError
+
+
+class CountingCall:
+    """Request stand-in that counts calls and can be held open."""
+    
+    def __init__(self, result=None, gate=None):
+        self.result = result or {'category': 'safe'}
+        self.gate = gate
+        self.calls = 0
+    
+    async def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        return dict(self.result)
+
+
+class TestCoalesce:
+    """Test cases for BaseModelWrapper._coalesce."""
+    
+    @pytest.mark.asyncio
+    async def test_cache_hit_and_expiry(self):
+        """Test that results are reused until result_cache_ttl runs out."""
+        wrapper = CacheStubWrapper(result_cache_ttl=10.0)
+        key = wrapper._request_key('classify', 'text')
+        call = CountingCall()
+        
+        with patch('src.wrappers.base_wrapper.time') as clock:
+            clock.monotonic.return_value = 100.0
+            await wrapper._coalesce(key, call)
+            await wrapper._coalesce(key, call)
+            assert call.calls == 1
+            
+            clock.monotonic.return_value = 110.0
+            await wrapper._coalesce(key, call)
+            assert call.calls == 2
+        
+        stats = wrapper.cache_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 2
+    
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """Test that the least recently used result is evicted first."""
+        wrapper = CacheStubWrapper(result_cache_size=2)
+        calls = {name: CountingCall() for name in 'abc'}
+        keys = {name: wrapper._request_key('classify', name) for name in 'abc'}
+        
+        for name in 'aba':
+            await wrapper._coalesce(keys[name], calls[name])
+        await wrapper._coalesce(keys['c'], calls['c'])
+        for name in 'ab':
+            await wrapper._coalesce(keys[name], calls[name])
+        
+        assert calls['a'].calls == 1
+        assert calls['b'].calls == 2
+        assert wrapper.cache_stats()['size'] == 2
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_call(self):
+        """Test that identical concurrent requests are issued once."""
+        wrapper = CacheStubWrapper()
+        key = wrapper._request_key('classify', 'text')
+        gate = asyncio.Event()
+        call = CountingCall(gate=gate)
+        
+        tasks = [asyncio.create_task(wrapper._coalesce(key, call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*tasks)
+        
+        assert call.calls == 1
+        assert results == [{'category': 'safe'}] * 3
+        assert wrapper.cache_stats()['coalesced'] == 2
+    
+    @pytest.mark.asyncio
+    async def test_waiter_takes_over_when_leader_cancelled(self):
+        """Test that a waiter issues the request itself if the leader is cancelled."""
+        wrapper = CacheStubWrapper()
+        key = wrapper._request_key('classify', 'text')
+        leader_call = CountingCall(gate=asyncio.Event())
+        waiter_call = CountingCall({'category': 'spam'})
+        
+        leader = asyncio.create_task(wrapper._coalesce(key, leader_call))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(wrapper._coalesce(key, waiter_call))
+        await asyncio.sleep(0)
+        leader.cancel()
+        
+        assert await asyncio.wait_for(waiter, 1.0) == {'category': 'spam'}
+        assert leader.cancelled()
+        assert waiter_call.calls == 1
+        assert key not in wrapper._inflight
+    
+    @pytest.mark.asyncio
+    async def test_callers_get_independent_copies(self):
+        """Test that annotating one caller's result leaves the others intact."""
+        wrapper = CacheStubWrapper()
+        key = wrapper._request_key('classify', 'text')
+        gate = asyncio.Event()
+        call = CountingCall(gate=gate)
+        
+        tasks = [asyncio.create_task(wrapper._coalesce(key, call)) for _ in range(2)]
+        await asyncio.sleep(0)
+        gate.set()
+        first, second = await asyncio.gather(*tasks)
+        first['annotated'] = True
+        cached = await wrapper._coalesce(key, call)
+        cached['category'] = 'changed'
+        
+        assert 'annotated' not in second
+        assert await wrapper._coalesce(key, call) == {'category': 'safe'}
+        assert call.calls == 1
@@ -0,0 +1,172 @@
+"""
+Unit tests for the Fireworks wrapper's batched classification.
+"""
+
+import pytest
+import asyncio
+import orjson
+from unittest.mock import AsyncMock, Mock
+
+from src.wrappers.fireworks_wrapper import FireworksBatcher, FireworksWrapper, _extract_json
+
+CATEGORIES = ['safe', 'spam', 'hate_speech']
+TEXTS = ['hello', 'buy now', 'you people']
+
+
+def _reply(content):
+    """Build a generate() response carrying the given content."""
+    if not isinstance(content, str):
+        content = orjson.dumps(content).decode()
+    return {'content': content}
+
+
+def _entry(index, category):
+    """Build one batched classification entry."""
+    return {'index': index, 'category': category, 'confidence': 0.9, 'reasoning': 'test'}
+
+
+def _single(text, categories):
+    """Stand-in for an individual classification request."""
+    return {'category': f'retried:{text}', 'confidence': 0.5, 'reasoning': '', 'all_categories': categories}
+
+
+@pytest.fixture
+def wrapper():
+    """Create a Fireworks wrapper whose requests are stubbed."""
+    wrapper = FireworksWrapper({'api_key': 'test-key', 'model_name': 'test-model'})
+    wrapper._classify_one = AsyncMock(side_effect=_single)
+    return wrapper
+
+
+class TestExtractJson:
+    """Test cases for parsing JSON out of model replies."""
+    
+    @pytest.mark.parametrize("content,expected", [
+        ('{"category": "safe"}', {'category': 'safe'}),
+        ('Sure! {"category": "safe"} Hope that helps.', {'category': 'safe'}),
+        ('{"category": "safe"} Note: {not json}', {'category': 'safe'}),
+        ('Result:\n{"reasoning": "uses {braces}", "category": "spam"}\n', {'reasoning': 'uses {braces}', 'category': 'spam'})
+    ], ids=["bare", "prose_around", "trailing_braces", "braces_in_string"])
+    def test_extract_json(self, content, expected):
+        """Test extracting the first JSON object from a reply."""
+        assert _extract_json(content) == expected
+    
+    @pytest.mark.parametrize("content", ["no json here", "{broken", "prefix {\"a\": }"])
+    def test_extract_json_invalid(self, content):
+        """Test that replies without a parseable object raise orjson's error."""
+        with pytest.raises(orjson.JSONDecodeError):
+            _extract_json(content)
+
+
+class TestClassifyMany:
+    """Test cases for matching batched replies back to their texts."""
+    
+    @pytest.mark.asyncio
+    async def test_reordered_entries_matched_by_index(self, wrapper):
+        """Test that entries are matched by index, not position."""
+        wrapper._generate = AsyncMock(return_value=_reply(
+            {'results': [_entry(3, 'hate_speech'), _entry(1, 'safe'), _entry(2, 'spam')]}
+        ))
+        
+        results = await wrapper._classify_many(TEXTS, CATEGORIES)
+        
+        assert [result['category'] for result in results] == ['safe', 'spam', 'hate_speech']
+        assert all(result['all_categories'] == CATEGORIES for result in results)
+        wrapper._classify_one.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_partial_reply_retries_missing_texts(self, wrapper):
+        """Test that texts without a usable entry are classified individually."""
+        wrapper._generate = AsyncMock(return_value=_reply({'results': [
+            _entry(2, 'spam'),
+            _entry(3, 'safe'),
+            _entry(3, 'hate_speech'),
+            _entry(7, 'spam'),
+            _entry('1', 'safe'),
+            'not an entry'
+        ]}))
+        
+        results = await wrapper._classify_many(TEXTS, CATEGORIES)
+        
+        assert [result['category'] for result in results] == ['retried:hello', 'spam', 'retried:you people']
+        assert sorted(call.args[0] for call in wrapper._classify_one.await_args_list) == ['hello', 'you people']
+    
+    @pytest.mark.parametrize("content", [
+        "I cannot classify these texts.",
+        {'results': 'none'},
+        ['not', 'an', 'object']
+    ], ids=["prose", "results_not_list", "top_level_list"])
+    @pytest.mark.asyncio
+    async def test_garbage_reply_retries_every_text(self, wrapper, content):
+        """Test that an unusable reply falls back to individual requests."""
+        wrapper._generate = AsyncMock(return_value=_reply(content))
+        
+        results = await wrapper._classify_many(TEXTS, CATEGORIES)
+        
+        assert [result['category'] for result in results] == [f'retried:{text}' for text in TEXTS]
+        assert wrapper._classify_one.await_count == len(TEXTS)
+
+
+class TestFireworksBatcher:
+    """Test cases for the FireworksBatcher class."""
+    
+    @pytest.fixture
+    def stub_wrapper(self):
+        """Create a stand-in wrapper that records the batches it receives."""
+        stub = Mock()
+        stub._classify_one = AsyncMock(side_effect=lambda text, categories: {'category': text, 'batched': False})
+        stub._classify_many = AsyncMock(
+            side_effect=lambda texts, categories: [{'category': text, 'batched': True} for text in texts]
+        )
+        return stub
+    
+    @pytest.mark.asyncio
+    async def test_groups_by_category_set(self, stub_wrapper):
+        """Test that only texts sharing a category set share a request."""
+        batcher = FireworksBatcher(stub_wrapper, batch_size=8, batch_timeout_ms=50)
+        
+        results = await asyncio.gather(
+            batcher.submit('a', ['safe', 'spam']),
+            batcher.submit('b', ['safe', 'spam']),
+            batcher.submit('c', ['safe', 'hate_speech'])
+        )
+        await batcher.close()
+        
+        assert results == [
+            {'category': 'a', 'batched': True},
+            {'category': 'b', 'batched': True},
+            {'category': 'c', 'batched': False}
+        ]
+        stub_wrapper._classify_many.assert_awaited_once_with(['a', 'b'], ['safe', 'spam'])
+        stub_wrapper._classify_one.assert_awaited_once_with('c', ['safe', 'hate_speech'])
+    
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller_in_batch(self, stub_wrapper):
+        """Test that a failed batch request fails each of its callers."""
+        stub_wrapper._classify_many.side_effect = RuntimeError("boom")
+        batcher = FireworksBatcher(stub_wrapper, batch_size=8, batch_timeout_ms=50)
+        
+        results = await asyncio.gather(
+            batcher.submit('a', CATEGORIES),
+            batcher.submit('b', CATEGORIES),
+            return_exceptions=True
+        )
+        await batcher.close()
+        
+        assert all(isinstance(result, RuntimeError) for result in results)
+    
+    @pytest.mark.asyncio
+    async def test_close_stops_and_restarts(self, stub_wrapper):
+        """Test that close() stops the background task and submit() restarts it."""
+        batcher = FireworksBatcher(stub_wrapper, batch_size=8, batch_timeout_ms=1)
+        await batcher.submit('a', CATEGORIES)
+        task = batcher._task
+        
+        await batcher.close()
+        
+        assert task.cancelled()
+        assert batcher._task is None
+        await batcher.close()
+        
+        assert await batcher.submit('b', CATEGORIES) == {'category': 'b', 'batched': False}
+        await batcher.close()
@@ -0,0 +1,185 @@
+"""
+Unit tests for the metrics collector.
+"""
+
+import pytest
+import csv
+import io
+import threading
+import orjson
+from datetime import datetime
+from unittest.mock import patch
+
+from src.utils.metrics import MetricsCollector
+
+# Start of a minute, so offsets in tests map to predictable buckets
+T0 = 1_700_000_040.0
+
+
+def _validation_result(is_valid: bool = True) -> dict:
+    """Build a minimal validation result."""
+    return {
+        'validation': {'is_valid': is_valid, 'confidence': 0.9, 'model_provider': 'openai', 'violations': []},
+        'metadata': {'processing_time': 0.5}
+    }
+
+
+def _classification_result(category: str) -> dict:
+    """Build a minimal classification result."""
+    return {
+        'classification': {'category': category, 'confidence': 0.8, 'model_provider': 'openai'},
+        'metadata': {'processing_time': 0.5}
+    }
+
+
+class TestMetricsCollector:
+    """Test cases for the MetricsCollector class."""
+    
+    def test_summary_cache_serves_snapshot_until_ttl(self):
+        """Test that cached summaries ignore writes until the TTL expires."""
+        collector = MetricsCollector(summary_ttl=60.0)
+        collector.record_validation('text', _validation_result())
+        
+        first = collector.get_summary()
+        collector.record_validation('text', _validation_result())
+        assert collector.get_summary()['counters']['validations_text'] == 1
+        
+        with patch('src.utils.metrics.time.monotonic', return_value=float('inf')):
+            assert collector.get_summary()['counters']['validations_text'] == 2
+        assert first['counters']['validations_text'] == 1
+    
+    def test_summary_cache_returns_copies(self):
+        """Test that callers can replace top-level keys without touching the cache."""
+        collector = MetricsCollector(summary_ttl=60.0)
+        
+        summary = collector.get_summary()
+        summary['counters'] = None
+        health = collector.health_check()
+        health['status'] = 'unhealthy'
+        
+        assert collector.get_summary()['counters'] == {}
+        assert collector.health_check()['status'] == 'healthy'
+    
+    def test_reset_metrics_drops_cached_summary(self):
+        """Test that resetting metrics is visible immediately."""
+        collector = MetricsCollector(summary_ttl=60.0)
+        collector.record_validation('text', _validation_result())
+        assert collector.get_summary()['counters']['validations_text'] == 1
+        
+        collector.reset_metrics()
+        
+        assert collector.get_summary()['counters'] == {}
+    
+    def test_records_in_one_minute_share_a_bucket(self):
+        """Test that aggregates are kept per minute rather than per record."""
+        collector = MetricsCollector(summary_ttl=0.0)
+        
+        with patch('src.utils.metrics.time') as clock:
+            for now in (T0, T0 + 30, T0 + 59, T0 + 60):
+                clock.time.return_value = now
+                collector.record_validation('text', _validation_result(is_valid=now != T0 + 30))
+        
+        buckets = collector.validation_aggregates['text']
+        assert [bucket['count'] for bucket in buckets] == [3, 1]
+        assert [bucket['valid_count'] for bucket in buckets] == [2, 1]
+        assert len(collector.validation_metrics['text']) == 4
+    
+    def test_summary_rolls_across_window(self):
+        """Test that summaries only aggregate buckets inside the requested period."""
+        collector = MetricsCollector(window_hours=2, summary_ttl=0.0)
+        
+        with patch('src.utils.metrics.time') as clock:
+            for now, category, duration in (
+                (T0, 'spam', 0.1),
+                (T0 + 1800, 'safe', 0.4),
+                (T0 + 3600, 'safe', 0.2)
+            ):
+                clock.time.return_value = now
+                collector.record_validation('text', _validation_result(is_valid=category == 'safe'))
+                collector.record_classification('text', _classification_result(category))
+                collector.record_performance('classify', duration)
+            
+            clock.time.return_value = T0 + 3600
+            two_hours = collector.get_summary(hours=2)
+            
+            clock.time.return_value = T0 + 3600 + 120
+            one_hour = collector.get_summary(hours=1)
+        
+        assert two_hours['validation_summary']['text']['total_validations'] == 3
+        assert two_hours['classification_summary']['text']['category_distribution'] == {'spam': 1, 'safe': 2}
+        assert two_hours['performance_summary']['classify']['min_duration'] == 0.1
+        
+        assert one_hour['validation_summary']['text']['total_validations'] == 2
+        assert one_hour['validation_summary']['text']['success_rate'] == 1.0
+        assert one_hour['classification_summary']['text']['category_distribution'] == {'safe': 2}
+        assert one_hour['performance_summary']['classify'] == {
+            'total_operations': 2,
+            'avg_duration': pytest.approx(0.3),
+            'min_duration': 0.2,
+            'max_duration': 0.4
+        }
+    
+    def test_buckets_older_than_window_are_evicted(self):
+        """Test that the per-minute ring only holds window_hours of buckets."""
+        collector = MetricsCollector(window_hours=1, summary_ttl=0.0)
+        
+        with patch('src.utils.metrics.time') as clock:
+            for minute in range(61):
+                clock.time.return_value = T0 + minute * 60
+                collector.record_performance('classify', float(minute))
+        
+        buckets = collector.performance_aggregates['classify']
+        assert len(buckets) == 60
+        assert buckets[0]['min_duration'] == 1.0
+    
+    def test_counters_sum_thread_shards(self):
+        """Test that counters from every thread's shard are added together."""
+        collector = MetricsCollector(summary_ttl=0.0)
+        barrier = threading.Barrier(4)
+        
+        def record():
+            barrier.wait()
+            for _ in range(100):
+                collector.record_error('timeout', 'timed out')
+        
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(collector._counter_shards) == 4
+        assert collector.counters == {'errors_timeout': 400, 'total_errors': 400}
+        
+        collector.reset_metrics()
+        assert collector._counter_shards == {}
+        assert collector.counters == {}
+    
+    def test_export_csv(self):
+        """Test exporting counters as CSV."""
+        collector = MetricsCollector(summary_ttl=0.0)
+        collector.record_validation('text', _validation_result(is_valid=False))
+        collector.record_error('rate_limit', 'slow down, please')
+        
+        rows = list(csv.reader(io.StringIO(collector.export_metrics('csv'))))
+        
+        assert rows[0] == ['metric', 'value']
+        assert sorted(rows[1:]) == [
+            ['errors_rate_limit', '1'],
+            ['invalid_validations_text', '1'],
+            ['total_errors', '1'],
+            ['validations_text', '1']
+        ]
+    
+    def test_export_json(self):
+        """Test exporting the summary as JSON with ISO error timestamps."""
+        collector = MetricsCollector(summary_ttl=0.0)
+        collector.record_error('rate_limit', 'slow down')
+        
+        exported = orjson.loads(collector.export_metrics('json'))
+        
+        recent = exported['error_summary']['rate_limit']['recent_errors'][0]
+        assert recent['msg'] == 'slow down'
+        assert datetime.fromisoformat(recent['ts'])
+        with pytest.raises(ValueError):
+            collector.export_metrics('xml')
@@ -0,0 +1,105 @@
+"""
+Unit tests for the OpenAI wrapper's streamed JSON extraction.
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from src.wrappers.openai_wrapper import OpenAIWrapper, _JSONObjectScanner
+
+
+class FakeStream:
+    """Async iterable standing in for an OpenAI chat completion stream."""
+    
+    def __init__(self, deltas, finish_reason=None):
+        self.chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta), finish_reason=None)])
+            for delta in deltas
+        ]
+        if finish_reason is not None:
+            self.chunks.append(SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=None), finish_reason=finish_reason)]
+            ))
+        self.consumed = 0
+        self.closed = False
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        if self.consumed == len(self.chunks):
+            raise StopAsyncIteration
+        self.consumed += 1
+        return self.chunks[self.consumed - 1]
+    
+    async def close(self):
+        self.closed = True
+
+
+def _scan(*pieces):
+    """Feed pieces to a fresh scanner, returning (piece number, end index) of the first match."""
+    scanner = _JSONObjectScanner()
+    for number, piece in enumerate(pieces):
+        end = scanner.feed(piece)
+        if end >= 0:
+            return number, end
+    return None
+
+
+@pytest.fixture
+def wrapper():
+    """Create an OpenAI wrapper with a placeholder key."""
+    return OpenAIWrapper({'api_key': 'test-key', 'default_model': 'gpt-4'})
+
+
+class TestJSONObjectScanner:
+    """Test cases for the _JSONObjectScanner class."""
+    
+    @pytest.mark.parametrize("pieces,expected", [
+        (['{"a": 1} trailing'], (0, 8)),
+        (['Here you go: {"a": {"b": 2}}'], (0, 28)),
+        (['{"reasoning": "uses } and {", "a": 1}'], (0, 37)),
+        (['{"quote": "say \\"}\\" twice"}'], (0, 28)),
+        (['{"path": "C:\\\\"}'], (0, 16)),
+        (['{"a": ', '"x}', '"', '}, more'], (3, 1)),
+        (['{"esc": "\\', '"}', '"}'], (2, 2)),
+        (['{"a": {"b": 1}', ' '], None),
+        (['no object here }'], None)
+    ], ids=[
+        "flat", "nested_after_prose", "braces_in_string", "escaped_quotes",
+        "escaped_backslash", "split_across_chunks", "escape_split_across_chunks",
+        "unterminated", "stray_closing_brace"
+    ])
+    def test_feed(self, pieces, expected):
+        """Test finding the end of the first top-level object."""
+        assert _scan(*pieces) == expected
+
+
+class TestGenerateJsonObject:
+    """Test cases for OpenAIWrapper.generate_json_object."""
+    
+    @pytest.mark.asyncio
+    async def test_stops_at_end_of_object(self, wrapper):
+        """Test that the stream is closed once the object is complete."""
+        stream = FakeStream(['Sure: {"category": ', '"spam", "note": "{x}"', '} and then', ' more text'])
+        wrapper.client.chat.completions.create = AsyncMock(return_value=stream)
+        
+        response = await wrapper.generate_json_object("prompt")
+        
+        assert response['content'] == 'Sure: {"category": "spam", "note": "{x}"}'
+        assert response['finish_reason'] == 'stop'
+        assert stream.consumed == 3
+        assert stream.closed
+    
+    @pytest.mark.asyncio
+    async def test_stream_ends_before_object_closes(self, wrapper):
+        """Test that a truncated object is returned as-is with its finish reason."""
+        stream = FakeStream(['{"category": "sp'], finish_reason='length')
+        wrapper.client.chat.completions.create = AsyncMock(return_value=stream)
+        
+        response = await wrapper.generate_json_object("prompt")
+        
+        assert response['content'] == '{"category": "sp'
+        assert response['finish_reason'] == 'length'
+        assert stream.closed
@@ -3,32 +3,101 @@ Unit tests for the output normalizer component.
 """
 
 import pytest
-import json
+import orjson
 from datetime import datetime
 from typing import Dict, Any
 
 from src.pipeline.output_normalizer import OutputNormalizer
 
 
-class TestOutputNormalizer:
-    """Test cases for the OutputNormalizer class."""
-    
-    @pytest.fixture
-    def normalizer(self):
-        """Create an output normalizer instance."""
-        return OutputNormalizer()
-    
-    def test_init(self, normalizer):
-        """Test normalizer initialization."""
-        assert normalizer.standard_format is not None
-        assert 'status' in normalizer.standard_format
-        assert 'timestamp' in normalizer.standard_format
-        assert 'validation' in normalizer.standard_format
-        assert 'classification' in normalizer.standard_format
-    
-    def test_normalize_basic_output(self, normalizer):
-        """Test normalizing basic pipeline output."""
-        pipeline_output = {
+def _check_basic_output(result):
+    """Check normalizing basic pipeline output."""
+    assert result['status'] == 'success'
+    assert result['timestamp'] is not None
+    assert result['validation']['is_valid'] is True
+    assert result['validation']['confidence'] == 0.9
+    assert result['classification']['category'] == 'safe'
+    assert result['classification']['confidence'] == 0.85
+
+
+def _check_validation_only(result):
+    """Check normalizing output with only validation results."""
+    assert result['status'] == 'validation_failed'
+    assert result['validation']['is_valid'] is False
+    assert len(result['validation']['violations']) == 1
+    assert len(result['validation']['suggestions']) == 1
+    assert result['classification']['category'] == 'unknown'
+
+
+def _check_classification_only(result):
+    """Check normalizing output with only classification results."""
+    assert result['status'] == 'content_flagged'
+    assert result['classification']['category'] == 'hate_speech'
+    assert result['classification']['confidence'] == 0.95
+    assert result['validation']['is_valid'] is False
+
+
+def _check_with_errors(result):
+    """Check normalizing output with errors."""
+    assert result['status'] == 'error'
+    assert len(result['errors']) == 1
+    assert 'API rate limit exceeded' in result['errors']
+
+
+def _check_with_metadata(result):
+    """Check normalizing output with metadata."""
+    assert result['metadata']['processing_time'] == 1.5
+    assert result['metadata']['model_used'] == 'gpt-4'
+    assert result['metadata']['tokens_used'] == 200
+
+
+def _check_validation_details(result):
+    """Check normalizing validation with detailed results."""
+    assert result['validation']['validation_type'] == 'ai_model'
+    assert result['validation']['model_provider'] == 'openai'
+    assert 'basic_validation' in result['validation']['details']
+    assert 'ai_validation' in result['validation']['details']
+
+
+def _check_classification_thresholds(result):
+    """Check normalizing classification with threshold information."""
+    assert result['classification']['threshold_met'] is True
+    assert result['classification']['threshold'] == 0.7
+    assert result['classification']['classification_type'] == 'ai_model'
+    assert result['classification']['model_provider'] == 'openai'
+
+
+def _check_malformed_violations(result):
+    """Check normalizing with malformed violations (not a list)."""
+    assert isinstance(result['validation']['violations'], list)
+    assert len(result['validation']['violations']) == 1
+    assert result['validation']['violations'][0] == 'Single violation string'
+
+
+def _check_malformed_suggestions(result):
+    """Check normalizing with malformed suggestions (not a list)."""
+    assert isinstance(result['validation']['suggestions'], list)
+    assert len(result['validation']['suggestions']) == 1
+    assert result['validation']['suggestions'][0] == 'Single suggestion string'
+
+
+def _check_malformed_categories(result):
+    """Check normalizing with malformed categories (not a list)."""
+    assert isinstance(result['classification']['all_categories'], list)
+    assert len(result['classification']['all_categories']) == 1
+    assert result['classification']['all_categories'][0] == 'single_category'
+
+
+def _check_unhashable_category(result):
+    """Check that a non-string category is kept and never counts as flagged."""
+    assert result['status'] == 'success'
+    assert result['classification']['category'] == ['hate_speech']
+
+
+# Pipeline outputs paired with checks on their normalized form
+NORMALIZE_CASES = [
+    pytest.param(
+        {
             'validation': {
                 'is_valid': True,
                 'confidence': 0.9,
@@ -41,73 +110,47 @@ class TestOutputNormalizer:
                 'reasoning': 'Content appears safe',
                 'all_categories': ['safe', 'unsafe']
             }
-        }
-        
-        result = normalizer.normalize(pipeline_output)
-        
-        assert result['status'] == 'success'
-        assert result['timestamp'] is not None
-        assert result['validation']['is_valid'] is True
-        assert result['validation']['confidence'] == 0.9
-        assert result['classification']['category'] == 'safe'
-        assert result['classification']['confidence'] == 0.85
-    
-    def test_normalize_validation_only(self, normalizer):
-        """Test normalizing output with only validation results."""
-        pipeline_output = {
+        },
+        _check_basic_output,
+        id="basic_output"
+    ),
+    pytest.param(
+        {
             'validation': {
                 'is_valid': False,
                 'confidence': 0.7,
                 'violations': ['Contains inappropriate content'],
                 'suggestions': ['Remove inappropriate language']
             }
-        }
-        
-        result = normalizer.normalize(pipeline_output)
-        
-        assert result['status'] == 'validation_failed'
-        assert result['validation']['is_valid'] is False
-        assert len(result['validation']['violations']) == 1
-        assert len(result['validation']['suggestions']) == 1
-        assert result['classification']['category'] == 'unknown'
-    
-    def test_normalize_classification_only(self, normalizer):
-        """Test normalizing output with only classification results."""
-        pipeline_output = {
+        },
+        _check_validation_only,
+        id="validation_only"
+    ),
+    pytest.param(
+        {
             'classification': {
                 'category': 'hate_speech',
                 'confidence': 0.95,
                 'reasoning': 'Contains discriminatory language',
                 'all_categories': ['safe', 'hate_speech']
             }
-        }
-        
-        result = normalizer.normalize(pipeline_output)
-        
-        assert result['status'] == 'content_flagged'
-        assert result['classification']['category'] == 'hate_speech'
-        assert result['classification']['confidence'] == 0.95
-        assert result['validation']['is_valid'] is False
-    
-    def test_normalize_with_errors(self, normalizer):
-        """Test normalizing output with errors."""
-        pipeline_output = {
+        },
+        _check_classification_only,
+        id="classification_only"
+    ),
+    pytest.param(
+        {
             'validation': {
                 'is_valid': True,
                 'confidence': 0.8
             },
             'errors': ['API rate limit exceeded']
-        }
-        
-        result = normalizer.normalize(pipeline_output)
-        
-        assert result['status'] == 'error'
-        assert len(result['errors']) == 1
-        assert 'API rate limit exceeded' in result['errors']
-    
-    def test_normalize_with_metadata(self, normalizer):
-        """Test normalizing output with metadata."""
-        pipeline_output = {
+        },
+        _check_with_errors,
+        id="with_errors"
+    ),
+    pytest.param(
+        {
             'validation': {
                 'is_valid': True,
                 'confidence': 0.9
@@ -117,17 +160,12 @@ class TestOutputNormalizer:
                 'model_used': 'gpt-4',
                 'tokens_used': 200
             }
-        }
-        
-        result = normalizer.normalize(pipeline_output)
-        
-        assert result['metadata']['processing_time'] == 1.5
-        assert result['metadata']['model_used'] == 'gpt-4'
-        assert result['metadata']['tokens_used'] == 200
-    
-    def test_normalize_validation_details(self, normalizer):
-        """Test normalizing validation with detailed results."""
-        pipeline_output = {
+        },
+        _check_with_metadata,
+        id="with_metadata"
+    ),
+    pytest.param(
+        {
             'validation': {
                 'is_valid': True,
                 'confidence': 0.9,
@@ -144,18 +182,12 @@ class TestOutputNormalizer:
                     }
                 }
             }
-        }
-        
-        result = normalizer.normalize(pipeline_output)
-        
-        assert result['validation']['validation_type'] == 'ai_model'
-        assert result['validation']['model_provider'] == 'openai'
-        assert 'basic_validation' in result['validation']['details']
-        assert 'ai_validation' in result['validation']['details']
-    
-    def test_normalize_classification_thresholds(self, normalizer):
-        """Test normalizing classification with threshold information."""
-        pipeline_output = {
+        },
+        _check_validation_details,
+        id="validation_details"
+    ),
+    pytest.param(
+        {
             'classification': {
                 'category': 'safe',
                 'confidence': 0.75,
@@ -164,103 +196,98 @@ class TestOutputNormalizer:
                 'classification_type': 'ai_model',
                 'model_provider': 'openai'
             }
-        }
-        
-        result = normalizer.normalize(pipeline_output)
-        
-        assert result['classification']['threshold_met'] is True
-        assert result['classification']['threshold'] == 0.7
-        assert result['classification']['classification_type'] == 'ai_model'
-        assert result['classification']['model_provider'] == 'openai'
-    
-    def test_normalize_malformed_violations(self, normalizer):
-        """Test normalizing with malformed violations (not a list)."""
-        pipeline_output = {
+        },
+        _check_classification_thresholds,
+        id="classification_thresholds"
+    ),
+    pytest.param(
+        {
             'validation': {
                 'is_valid': False,
                 'violations': 'Single violation string'
             }
-        }
-        
-        result = normalizer.normalize(pipeline_output)
-        
-        assert isinstance(result['validation']['violations'], list)
-        assert len(result['validation']['violations']) == 1
-        assert result['validation']['violations'][0] == 'Single violation string'
-    
-    def test_normalize_malformed_suggestions(self, normalizer):
-        """Test normalizing with malformed suggestions (not a list)."""
-        pipeline_output = {
+        },
+        _check_malformed_violations,
+        id="malformed_violations"
+    ),
+    pytest.param(
+        {
             'validation': {
                 'is_valid': True,
                 'suggestions': 'Single suggestion string'
             }
-        }
-        
-        result = normalizer.normalize(pipeline_output)
-        
-        assert isinstance(result['validation']['suggestions'], list)
-        assert len(result['validation']['suggestions']) == 1
-        assert result['validation']['suggestions'][0] == 'Single suggestion string'
-    
-    def test_normalize_malformed_categories(self, normalizer):
-        """Test normalizing with malformed categories (not a list)."""
-        pipeline_output = {
+        },
+        _check_malformed_suggestions,
+        id="malformed_suggestions"
+    ),
+    pytest.param(
+        {
             'classification': {
                 'category': 'safe',
                 'all_categories': 'single_category'
             }
-        }
-        
-        result = normalizer.normalize(pipeline_output)
-        
-        assert isinstance(result['classification']['all_categories'], list)
-        assert len(result['classification']['all_categories']) == 1
-        assert result['classification']['all_categories'][0] == 'single_category'
-    
-    def test_determine_overall_status_success(self, normalizer):
-        """Test determining overall status for successful validation."""
-        normalized_output = {
-            'errors': [],
-            'validation': {'is_valid': True},
-            'classification': {'category': 'safe'}
-        }
-        
-        status = normalizer._determine_overall_status(normalized_output)
-        assert status == 'success'
+        },
+        _check_malformed_categories,
+        id="malformed_categories"
+    ),
+    pytest.param(
+        {
+            'validation': {
+                'is_valid': True,
+                'confidence': 0.9
+            },
+            'classification': {
+                'category': ['hate_speech'],
+                'confidence': 0.9
+            }
+        },
+        _check_unhashable_category,
+        id="unhashable_category"
+    )
+]
+
+
+@pytest.fixture(scope="module")
+def normalizer():
+    """Create an output normalizer instance shared by the module."""
+    return OutputNormalizer()
+
+
+class TestOutputNormalizer:
+    """Test cases for the OutputNormalizer class."""
     
-    def test_determine_overall_status_error(self, normalizer):
-        """Test determining overall status with errors."""
-        normalized_output = {
-            'errors': ['Some error'],
-            'validation': {'is_valid': True},
-            'classification': {'category': 'safe'}
-        }
-        
-        status = normalizer._determine_overall_status(normalized_output)
-        assert status == 'error'
+    def test_init(self, normalizer):
+        """Test normalizer initialization."""
+        assert normalizer.standard_format is not None
+        assert 'status' in normalizer.standard_format
+        assert 'timestamp' in normalizer.standard_format
+        assert 'validation' in normalizer.standard_format
+        assert 'classification' in normalizer.standard_format
     
-    def test_determine_overall_status_validation_failed(self, normalizer):
-        """Test determining overall status when validation fails."""
-        normalized_output = {
-            'errors': [],
-            'validation': {'is_valid': False},
-            'classification': {'category': 'safe'}
-        }
-        
-        status = normalizer._determine_overall_status(normalized_output)
-        assert status == 'validation_failed'
+    @pytest.mark.parametrize("pipeline_output,check", NORMALIZE_CASES)
+    def test_normalize(self, normalizer, pipeline_output, check):
+        """Test normalizing pipeline output."""
+        check(normalizer.normalize(pipeline_output))
     
-    def test_determine_overall_status_content_flagged(self, normalizer):
-        """Test determining overall status when content is flagged."""
+    @pytest.mark.parametrize("errors,is_valid,category,expected", [
+        ([], True, 'safe', 'success'),
+        ([], True, 'hate_speech', 'content_flagged'),
+        ([], False, 'safe', 'validation_failed'),
+        ([], False, 'hate_speech', 'validation_failed'),
+        (['Some error'], True, 'safe', 'error'),
+        (['Some error'], True, 'hate_speech', 'error'),
+        (['Some error'], False, 'safe', 'error'),
+        (['Some error'], False, 'hate_speech', 'error')
+    ])
+    def test_determine_overall_status(self, normalizer, errors, is_valid, category, expected):
+        """Test determining overall status for every combination of outcomes."""
         normalized_output = {
-            'errors': [],
-            'validation': {'is_valid': True},
-            'classification': {'category': 'hate_speech'}
+            'errors': errors,
+            'validation': {'is_valid': is_valid},
+            'classification': {'category': category}
         }
         
-        status = normalizer._determine_overall_status(normalized_output)
-        assert status == 'content_flagged'
+        assert normalizer._determine_overall_status(normalized_output) == expected
     
     def test_create_error_output(self, normalizer):
         """Test creating standardized error output."""
@@ -340,24 +367,37 @@ class TestOutputNormalizer:
         json_string = normalizer.to_json(normalized_output)
         
         # Should be valid JSON
-        parsed = json.loads(json_string)
+        parsed = orjson.loads(json_string)
         assert parsed['status'] == 'success'
         assert parsed['validation']['is_valid'] is True
     
-    def test_to_json_with_error(self, normalizer):
-        """Test JSON conversion with error handling."""
-        # Create output with non-serializable object
+    def test_to_json_with_datetime(self, normalizer):
+        """Test JSON conversion of datetime values."""
         normalized_output = {
             'status': 'success',
-            'timestamp': datetime.now(),  # This will cause serialization issue
+            'timestamp': datetime(2024, 1, 15, 10, 30),
             'validation': {'is_valid': True}
         }
         
         json_string = normalizer.to_json(normalized_output)
         
-        # Should handle the error and return valid JSON
-        parsed = json.loads(json_string)
-        assert 'timestamp' in parsed
+        # Datetimes are written as ISO 8601
+        parsed = orjson.loads(json_string)
+        assert parsed['timestamp'] == '2024-01-15T10:30:00'
+    
+    def test_to_json_with_non_string_keys(self, normalizer):
+        """Test JSON conversion of dicts with non-string keys."""
+        normalized_output = {
+            'status': 'success',
+            'details': {1: 'first', 2: 'second'}
+        }
+        
+        json_string = normalizer.to_json(normalized_output)
+        
+        # Keys are converted to strings, as json.dumps does
+        parsed = orjson.loads(json_string)
+        assert parsed['status'] == 'success'
+        assert parsed['details'] == {'1': 'first', '2': 'second'}
     
     def test_from_json(self, normalizer):
         """Test parsing JSON string to normalized output."""
@@ -4,62 +4,161 @@ Unit tests for the validator component.
 
 import pytest
 import asyncio
-from unittest.mock import Mock, patch, AsyncMock
+import json
+from datetime import datetime
+from types import MappingProxyType
+from unittest.mock import Mock, patch
 from typing import Dict, Any
 
+import aiohttp
+import openai
+
 from src.pipeline.validator import Validator
+from src.wrappers import BaseModelWrapper
+
+
+# Built once at import; the validator only reads its configuration
+_CONFIG = {
+    'models': {
+        'default': 'openai',
+        'providers': {
+            'openai': {
+                'api_key': 'test_key',
+                'default_model': 'gpt-4',
+                'max_tokens': 4096,
+                'temperature': 0.1,
+                'timeout': 30
+            }
+        }
+    },
+    'validation': {
+        'threshold': 0.8,
+        'confidence_threshold': 0.7,
+        'max_retries': 3,
+        'retry_delay': 1.0,
+        'content_types': {
+            'text': {
+                'max_length': 10000,
+                'min_length': 10,
+                'allowed_languages': ['en', 'es', 'fr']
+            }
+        }
+    }
+}
+
+
+@pytest.fixture(scope="module")
+def mock_config():
+    """Create a read-only mock configuration shared by the module."""
+    return MappingProxyType(_CONFIG)
+
+
+@pytest.fixture(scope="module")
+def mock_openai_wrapper():
+    """Patch the OpenAI wrapper once for the whole module."""
+    with patch('src.pipeline.validator.OpenAIWrapper') as mock_wrapper:
+        mock_wrapper.return_value = Mock()
+        yield mock_wrapper
+
+
+# Outcome for a StubWrapper call that never completes
+PENDING = object()
+
+
+class StubWrapper:
+    """Model wrapper whose validate_with_prompt returns already-completed futures."""
+    
+    def __init__(self, *outcomes):
+        # Results, exceptions or PENDING, one per call; the last one repeats
+        self.outcomes = outcomes
+        self.call_count = 0
+    
+    def validate_with_prompt(self, content, rules_prompt, rules_checked):
+        outcome = self.outcomes[min(self.call_count, len(self.outcomes) - 1)]
+        self.call_count += 1
+        future = asyncio.get_running_loop().create_future()
+        if outcome is PENDING:
+            return future
+        if isinstance(outcome, BaseException):
+            future.set_exception(outcome)
+        else:
+            future.set_result(dict(outcome))
+        return future
+
+
+class RetryingStubWrapper(BaseModelWrapper):
+    """Model wrapper whose generate calls yield canned outcomes through the retrying path."""
+    
+    def __init__(self, *outcomes):
+        super().__init__({'retry_delay': 0})
+        # Results or exceptions, one per generate call; the last one repeats
+        self.outcomes = outcomes
+        self.call_count = 0
+    
+    async def generate(self, prompt, **kwargs):
+        outcome = self.outcomes[min(self.call_count, len(self.outcomes) - 1)]
+        self.call_count += 1
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return {'content': dict(outcome)}
+    
+    async def classify(self, text, categories):
+        raise NotImplementedError
+    
+    async def validate_with_prompt(self, content, rules_prompt, rules_checked):
+        response = await self._generate(content)
+        return response['content']
+
+
+class StubValidator(Validator):
+    """Validator whose rule checks and item validations return canned results."""
+    
+    def __init__(self, config):
+        super().__init__(config)
+        self.basic_result = None
+        self.ai_result = None
+        # When set, validate() yields these instead of validating; exceptions are raised
+        self.validate_results = None
+        self.validate_calls = 0
+    
+    def _validate_basic_rules(self, content, content_type):
+        if isinstance(self.basic_result, Exception):
+            raise self.basic_result
+        return self.basic_result
+    
+    async def _validate_with_ai(self, content, content_type):
+        return self.ai_result
+    
+    async def validate(self, content, content_type="text"):
+        if self.validate_results is None:
+            return await super().validate(content, content_type)
+        self.validate_calls += 1
+        result = next(self.validate_results)
+        if isinstance(result, Exception):
+            raise result
+        return result
 
 
 class TestValidator:
     """Test cases for the Validator class."""
     
     @pytest.fixture
-    def mock_config(self):
-        """Create a mock configuration."""
-        return {
-            'models': {
-                'default': 'openai',
-                'providers': {
-                    'openai': {
-                        'api_key': 'test_key',
-                        'default_model': 'gpt-4',
-                        'max_tokens': 4096,
-                        'temperature': 0.1,
-                        'timeout': 30
-                    }
-                }
-            },
-            'validation': {
-                'threshold': 0.8,
-                'confidence_threshold': 0.7,
-                'max_retries': 3,
-                'retry_delay': 1.0,
-                'content_types': {
-                    'text': {
-                        'max_length': 10000,
-                        'min_length': 10,
-                        'allowed_languages': ['en', 'es', 'fr']
-                    }
-                }
-            }
-        }
+    def validator(self, mock_config, mock_openai_wrapper):
+        """Create a validator instance with mock configuration."""
+        return Validator(mock_config)
     
     @pytest.fixture
-    def validator(self, mock_config):
-        """Create a validator instance with mock configuration."""
-        with patch('src.pipeline.validator.OpenAIWrapper') as mock_wrapper:
-            mock_wrapper.return_value = Mock()
-            return Validator(mock_config)
+    def stub_validator(self, mock_config, mock_openai_wrapper):
+        """Create a validator with canned validation results."""
+        return StubValidator(mock_config)
     
-    def test_init(self, mock_config):
+    def test_init(self, mock_config, mock_openai_wrapper):
         """Test validator initialization."""
-        with patch('src.pipeline.validator.OpenAIWrapper') as mock_wrapper:
-            mock_wrapper.return_value = Mock()
-            validator = Validator(mock_config)
-            
-            assert validator.config == mock_config
-            assert validator.validation_config == mock_config['validation']
-            assert 'openai' in validator.model_wrappers
+        validator = Validator(mock_config)
+        
+        assert validator.config == mock_config
+        assert validator.validation_config == mock_config['validation']
+        assert 'openai' in validator.model_wrappers
     
     def test_validate_basic_rules_text_valid(self, validator):
         """Test basic rule validation for valid text."""
@@ -134,6 +233,14 @@ class TestValidator:
         assert "no_explicit_content" in rules
         assert "appropriate_duration" in rules
     
+    def test_get_rules_prompt(self, validator):
+        """Test formatted validation rules are built once per content type."""
+        rules_prompt, rules_checked = validator._get_rules_prompt("text")
+        
+        assert "- no_hate_speech:" in rules_prompt
+        assert "no_spam" in rules_checked
+        assert validator._get_rules_prompt("text")[0] is rules_prompt
+    
     def test_combine_validation_results(self, validator):
         """Test combining validation results."""
         basic_result = {
@@ -186,26 +293,43 @@ class TestValidator:
         assert len(combined['suggestions']) == 1
         assert combined['confidence'] == pytest.approx(0.86, rel=1e-2)
     
+    def test_to_json(self, validator):
+        """Test serializing validation results to JSON."""
+        result = {
+            'is_valid': True,
+            'violations': [],
+            'confidence': 0.93,
+            'timestamp': datetime(2024, 1, 15, 10, 30),
+            'details': {1: 'first rule'}
+        }
+        
+        json_bytes = validator.to_json(result)
+        
+        assert isinstance(json_bytes, bytes)
+        parsed = json.loads(json_bytes)
+        assert parsed['is_valid'] is True
+        assert parsed['confidence'] == 0.93
+        assert parsed['timestamp'].startswith('2024-01-15')
+        assert parsed['details'] == {'1': 'first rule'}
+    
     @pytest.mark.asyncio
     async def test_validate_with_ai_success(self, validator):
         """Test AI validation with successful result."""
-        # Mock the wrapper
-        mock_wrapper = AsyncMock()
-        mock_wrapper.validate.return_value = {
+        stub_wrapper = StubWrapper({
             'is_valid': True,
             'violations': [],
             'suggestions': [],
             'confidence': 0.9,
             'model_provider': 'openai'
-        }
-        validator.model_wrappers['openai'] = mock_wrapper
+        })
+        validator.model_wrappers['openai'] = stub_wrapper
         
         result = await validator._validate_with_ai("Test content", "text")
         
         assert result['is_valid'] is True
         assert result['validation_type'] == 'ai_model'
         assert result['model_provider'] == 'openai'
-        mock_wrapper.validate.assert_called_once()
+        assert stub_wrapper.call_count == 1
     
     @pytest.mark.asyncio
     async def test_validate_with_ai_fallback(self, validator):
@@ -214,15 +338,13 @@ class TestValidator:
         validator.model_wrappers.pop('openai', None)
         
         # Add fallback provider
-        mock_wrapper = AsyncMock()
-        mock_wrapper.validate.return_value = {
+        validator.model_wrappers['fireworks'] = StubWrapper({
             'is_valid': True,
             'violations': [],
             'suggestions': [],
             'confidence': 0.8,
             'model_provider': 'fireworks'
-        }
-        validator.model_wrappers['fireworks'] = mock_wrapper
+        })
         
         result = await validator._validate_with_ai("Test content", "text")
         
@@ -241,42 +363,126 @@ class TestValidator:
         assert 'No AI models available' in result['violations'][0]
     
     @pytest.mark.asyncio
-    async def test_validate_success(self, validator):
-        """Test complete validation process."""
-        # Mock basic validation
-        with patch.object(validator, '_validate_basic_rules') as mock_basic:
-            mock_basic.return_value = {
-                'is_valid': True,
-                'violations': [],
-                'suggestions': [],
-                'confidence': 1.0,
-                'validation_type': 'basic_rules'
-            }
+    async def test_validate_with_ai_circuit_breaker(self, validator):
+        """Test that repeated provider failures open the circuit."""
+        stub_wrapper = StubWrapper(Exception("Provider down"))
+        validator.model_wrappers['openai'] = stub_wrapper
+        validator.breaker_threshold = 2
+        
+        for _ in range(2):
+            result = await validator._validate_with_ai("Test content", "text")
+            assert result['validation_type'] == 'ai_error'
+        
+        result = await validator._validate_with_ai("Test content", "text")
+        
+        assert result['validation_type'] == 'ai_error'
+        assert 'temporarily unavailable' in result['violations'][0]
+        assert stub_wrapper.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_validate_with_ai_circuit_breaker_forgets_old_failures(self, validator):
+        """Test that failures further apart than the cooldown never open the circuit."""
+        stub_wrapper = StubWrapper(Exception("Provider down"))
+        validator.model_wrappers['openai'] = stub_wrapper
+        validator.breaker_threshold = 2
+        validator.breaker_cooldown = 30.0
+        
+        with patch('src.pipeline.validator.time') as clock:
+            for now in (100.0, 140.0, 180.0):
+                clock.monotonic.return_value = now
+                result = await validator._validate_with_ai("Test content", "text")
+                assert 'AI validation failed' in result['violations'][0]
             
-            # Mock AI validation
-            with patch.object(validator, '_validate_with_ai') as mock_ai:
-                mock_ai.return_value = {
-                    'is_valid': True,
-                    'violations': [],
-                    'suggestions': [],
-                    'confidence': 0.9,
-                    'validation_type': 'ai_model',
-                    'model_provider': 'openai'
-                }
-                
-                result = await validator.validate("Test content", "text")
-                
-                assert result['is_valid'] is True
-                assert result['status'] == 'success'
-                assert 'validation' in result
-                assert 'classification' in result
+            clock.monotonic.return_value = 200.0
+            await validator._validate_with_ai("Test content", "text")
+            clock.monotonic.return_value = 201.0
+            result = await validator._validate_with_ai("Test content", "text")
+        
+        assert 'temporarily unavailable' in result['violations'][0]
+        assert stub_wrapper.call_count == 4
+    
+    @pytest.mark.asyncio
+    async def test_validate_with_ai_circuit_breaker_stops_inflight(self, validator):
+        """Test that opening the circuit stops calls already in flight."""
+        validator.model_wrappers['openai'] = StubWrapper(Exception("Provider down"), PENDING)
+        validator.breaker_threshold = 1
+        
+        results = await asyncio.wait_for(
+            asyncio.gather(*(validator._validate_with_ai("Test content", "text") for _ in range(3))),
+            timeout=1
+        )
+        
+        assert 'AI validation failed' in results[0]['violations'][0]
+        for result in results[1:]:
+            assert result['validation_type'] == 'ai_error'
+            assert 'temporarily unavailable' in result['violations'][0]
+        assert not validator._inflight_calls['openai']
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("error", [
+        asyncio.TimeoutError(),
+        aiohttp.ServerDisconnectedError(),
+        openai.APIConnectionError(request=Mock()),
+        openai.APITimeoutError(request=Mock())
+    ], ids=["timeout", "aiohttp_disconnect", "openai_connection", "openai_timeout"])
+    async def test_validate_with_ai_transient_retry(self, validator, error):
+        """Test that transient provider errors are retried by the wrapper."""
+        stub_wrapper = RetryingStubWrapper(
+            error,
+            {'is_valid': True, 'violations': [], 'suggestions': [], 'confidence': 0.9}
+        )
+        validator.model_wrappers['openai'] = stub_wrapper
+        
+        result = await validator._validate_with_ai("Test content", "text")
+        
+        assert result['is_valid'] is True
+        assert result['validation_type'] == 'ai_model'
+        assert stub_wrapper.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_validate_with_ai_permanent_error_not_retried(self, validator):
+        """Test that non-transient provider errors fail without retrying."""
+        stub_wrapper = RetryingStubWrapper(ValueError("Bad request"))
+        validator.model_wrappers['openai'] = stub_wrapper
+        
+        result = await validator._validate_with_ai("Test content", "text")
+        
+        assert result['validation_type'] == 'ai_error'
+        assert stub_wrapper.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_validate_success(self, stub_validator):
+        """Test complete validation process."""
+        stub_validator.basic_result = {
+            'is_valid': True,
+            'violations': [],
+            'suggestions': [],
+            'confidence': 1.0,
+            'validation_type': 'basic_rules'
+        }
+        stub_validator.ai_result = {
+            'is_valid': True,
+            'violations': [],
+            'suggestions': [],
+            'confidence': 0.9,
+            'validation_type': 'ai_model',
+            'model_provider': 'openai'
+        }
+        
+        result = await stub_validator.validate("Test content", "text")
+        
+        assert result['is_valid'] is True
+        assert result['status'] == 'success'
+        assert 'validation' in result
+        assert 'classification' in result
     
     @pytest.mark.asyncio
-    async def test_validate_error_handling(self, validator):
+    async def test_validate_error_handling(self, stub_validator):
         """Test validation error handling."""
-        with patch.object(validator, '_validate_basic_rules', side_effect=Exception("Test error")):
-            with pytest.raises(Exception):
-                await validator.validate("Test content", "text")
+        stub_validator.basic_result = Exception("Test error")
+        
+        with pytest.raises(Exception):
+            await stub_validator.validate("Test content", "text")
     
     def test_health_check(self, validator):
         """Test health check functionality."""
@@ -296,40 +502,54 @@ class TestValidator:
         assert 'No model wrappers available' in health['message']
     
     @pytest.mark.asyncio
-    async def test_validate_batch(self, validator):
+    async def test_validate_batch(self, stub_validator):
         """Test batch validation."""
         contents = ["Content 1", "Content 2", "Content 3"]
+        stub_validator.validate_results = iter([{'is_valid': True, 'status': 'success'}] * 3)
         
-        # Mock the validate method
-        with patch.object(validator, 'validate') as mock_validate:
-            mock_validate.return_value = {
-                'is_valid': True,
-                'status': 'success'
-            }
-            
-            results = await validator.validate_batch(contents, "text")
-            
-            assert len(results) == 3
-            assert mock_validate.call_count == 3
+        results = await stub_validator.validate_batch(contents, "text")
+        
+        assert len(results) == 3
+        assert stub_validator.validate_calls == 3
     
     @pytest.mark.asyncio
-    async def test_validate_batch_with_errors(self, validator):
+    async def test_validate_batch_with_errors(self, stub_validator):
         """Test batch validation with some errors."""
         contents = ["Content 1", "Content 2", "Content 3"]
         
-        # Mock the validate method to raise an exception for one item
-        with patch.object(validator, 'validate') as mock_validate:
-            mock_validate.side_effect = [
-                {'is_valid': True, 'status': 'success'},
-                Exception("Test error"),
-                {'is_valid': True, 'status': 'success'}
-            ]
-            
-            results = await validator.validate_batch(contents, "text")
-            
-            # Should have 2 successful results and 1 error logged
-            assert len(results) == 2
-            assert mock_validate.call_count == 3
+        # Raise an exception for one item
+        stub_validator.validate_results = iter([
+            {'is_valid': True, 'status': 'success'},
+            Exception("Test error"),
+            {'is_valid': True, 'status': 'success'}
+        ])
+        
+        results = await stub_validator.validate_batch(contents, "text")
+        
+        # Should have 2 successful results and 1 error logged
+        assert len(results) == 2
+        assert stub_validator.validate_calls == 3
+    
+    @pytest.mark.asyncio
+    async def test_validate_batch_concurrent(self, stub_validator):
+        """Test that batch items are validated concurrently."""
+        active = 0
+        peak = 0
+        
+        async def validate(content, content_type="text"):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0)
+            active -= 1
+            return {'is_valid': True, 'status': 'success'}
+        
+        stub_validator.validate = validate
+        
+        results = await stub_validator.validate_batch(["Content 1", "Content 2", "Content 3"], "text")
+        
+        assert len(results) == 3
+        assert peak == 3
 
 
 if __name__ == "__main__":